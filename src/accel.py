@@ -0,0 +1,91 @@
+import array
+
+# =========================
+#  Accelerometer helpers shared by code.py and the bench scripts
+# =========================
+
+FIXED_SHIFT = 8   # fixed-point state is raw counts << FIXED_SHIFT
+
+
+class LowPassFilter:
+    """
+    Exponential low-pass filter for x, y, z: f += alpha * (sample - f).
+
+    State lives in preallocated arrays and every update happens in place,
+    so filtering a sample does not allocate a new list.
+    Float mode filters m/s^2 values. Fixed mode (fixed=True) filters raw
+    ADXL345 counts with integer math only; `scale` is m/s^2 per count.
+    """
+
+    def __init__(self, alpha=0.2, fixed=False, scale=1.0):
+        self.alpha = alpha
+        self.scale = scale
+        self.k = int(alpha * (1 << FIXED_SHIFT) + 0.5)   # alpha as n / 256
+        self.fstate = array.array("f", (0.0, 0.0, 0.0))
+        self.istate = array.array("l", (0, 0, 0))
+        self.fixed = fixed
+
+    def set_fixed(self, fixed):
+        """Switch mode, carrying the current value over."""
+        if fixed == self.fixed:
+            return
+        x, y, z = self.get(0), self.get(1), self.get(2)
+        self.fixed = fixed
+        self.reset(x, y, z)
+
+    def reset(self, x, y, z):
+        """Start again from x, y, z (m/s^2)."""
+        if self.fixed:
+            unit = self.scale / (1 << FIXED_SHIFT)
+            s = self.istate
+            s[0] = int(x / unit)
+            s[1] = int(y / unit)
+            s[2] = int(z / unit)
+        else:
+            s = self.fstate
+            s[0] = x
+            s[1] = y
+            s[2] = z
+
+    def update(self, x, y, z):
+        """Filter one float sample (m/s^2) in place."""
+        a = self.alpha
+        s = self.fstate
+        s[0] += a * (x - s[0])
+        s[1] += a * (y - s[1])
+        s[2] += a * (z - s[2])
+
+    def update_x(self, x):
+        """Filter only X of one float sample (tilt moves need nothing else)."""
+        s = self.fstate
+        s[0] += self.alpha * (x - s[0])
+
+    def update_raw(self, raw, n):
+        """Filter n raw samples (x, y, z interleaved, oldest first) in place."""
+        k = self.k
+        s = self.istate
+        sx = s[0]
+        sy = s[1]
+        sz = s[2]
+        for i in range(0, 3 * n, 3):
+            sx += (k * ((raw[i] << FIXED_SHIFT) - sx)) >> FIXED_SHIFT
+            sy += (k * ((raw[i + 1] << FIXED_SHIFT) - sy)) >> FIXED_SHIFT
+            sz += (k * ((raw[i + 2] << FIXED_SHIFT) - sz)) >> FIXED_SHIFT
+        s[0] = sx
+        s[1] = sy
+        s[2] = sz
+
+    def update_raw_x(self, raw, n):
+        """Like update_raw(), X only; Y and Z keep their values."""
+        k = self.k
+        s = self.istate
+        sx = s[0]
+        for i in range(0, 3 * n, 3):
+            sx += (k * ((raw[i] << FIXED_SHIFT) - sx)) >> FIXED_SHIFT
+        s[0] = sx
+
+    def get(self, axis):
+        """Filtered value of one axis (0=x, 1=y, 2=z) in m/s^2."""
+        if self.fixed:
+            return self.istate[axis] * self.scale / (1 << FIXED_SHIFT)
+        return self.fstate[axis]
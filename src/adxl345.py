@@ -0,0 +1,180 @@
+# =========================
+#  ADXL345 FIFO streaming and activity interrupt (device only)
+# =========================
+#
+# The adafruit_adxl34x driver reads one sample per I2C transaction.
+# In stream mode the sensor keeps the newest 32 samples in its FIFO at
+# the output data rate, and we drain them all while holding the bus once.
+# Each 6-byte read of DATAX0..DATAZ1 pops one FIFO entry (the ADXL345
+# cannot return several entries in a single read).
+#
+# The activity interrupt lets the sensor tell us when X moved past a
+# threshold, so tilt moves don't need continuous sampling.
+# Outside stream mode a tilt only needs X: Adxl345Axis reads the two
+# DATAX bytes instead of all six.
+
+ADDRESS = 0x53
+
+REG_THRESH_ACT = 0x24
+REG_ACT_INACT_CTL = 0x27
+REG_BW_RATE = 0x2C
+REG_INT_ENABLE = 0x2E
+REG_INT_MAP = 0x2F
+REG_INT_SOURCE = 0x30
+REG_DATAX0 = 0x32
+REG_FIFO_CTL = 0x38
+REG_FIFO_STATUS = 0x39
+
+FIFO_BYPASS = 0x00
+FIFO_STREAM = 0x80
+
+FIFO_SIZE = 32
+
+# BW_RATE codes for the output data rates we use
+RATE_CODES = {
+    50: 0x09,
+    100: 0x0A,
+    200: 0x0B,
+    400: 0x0C,
+}
+
+# m/s^2 per raw count (full resolution, 4 mg/LSB)
+SCALE = 0.004 * 9.80665
+
+# m/s^2 per THRESH_ACT count (62.5 mg/LSB)
+ACT_SCALE = 0.0625 * 9.80665
+
+INT_ACTIVITY = 0x10
+ACT_DC_X = 0x40      # ACT_INACT_CTL: dc-coupled activity on X only
+
+
+class _Registers:
+    """Shared register access plus I2C traffic counters."""
+
+    def __init__(self, i2c, address):
+        # Imported here so the constants below can be used on the host too
+        from adafruit_bus_device.i2c_device import I2CDevice
+        self.device = I2CDevice(i2c, address)
+        self.cmd = bytearray(2)
+        self.buf = bytearray(6)
+        self.reads = 0       # I2C register reads
+        self.sessions = 0    # times we took the bus
+
+    def _write(self, register, value):
+        cmd = self.cmd
+        cmd[0] = register
+        cmd[1] = value
+        with self.device as dev:
+            dev.write(cmd)
+
+    def _read_byte(self, register):
+        cmd = self.cmd
+        cmd[0] = register
+        with self.device as dev:
+            dev.write_then_readinto(cmd, self.buf, out_end=1, in_end=1)
+        self.reads += 1
+        self.sessions += 1
+        return self.buf[0]
+
+
+class Adxl345Fifo(_Registers):
+    """Puts the ADXL345 FIFO in stream mode and drains it in one bus session."""
+
+    def __init__(self, i2c, rate=100, address=ADDRESS):
+        super().__init__(i2c, address)
+        self.start(rate)
+
+    def start(self, rate=100):
+        """Set the output data rate and switch the FIFO to stream mode."""
+        self.rate = rate
+        self._write(REG_BW_RATE, RATE_CODES[rate])
+        self._write(REG_FIFO_CTL, FIFO_STREAM)
+
+    def stop(self):
+        """Back to bypass mode (plain register reads)."""
+        self._write(REG_FIFO_CTL, FIFO_BYPASS)
+
+    def clear(self):
+        """Drop the buffered samples: bypass mode empties the FIFO."""
+        self._write(REG_FIFO_CTL, FIFO_BYPASS)
+        self._write(REG_FIFO_CTL, FIFO_STREAM)
+
+    def read_into(self, out):
+        """
+        Drain the FIFO into `out` (an array of raw counts, x, y, z
+        interleaved, room for FIFO_SIZE samples). Returns the sample count.
+        """
+        cmd = self.cmd
+        buf = self.buf
+        with self.device as dev:
+            self.sessions += 1
+            cmd[0] = REG_FIFO_STATUS
+            dev.write_then_readinto(cmd, buf, out_end=1, in_end=1)
+            n = buf[0] & 0x3F
+            if n > len(out) // 3:
+                n = len(out) // 3
+            cmd[0] = REG_DATAX0
+            j = 0
+            for _ in range(n):
+                dev.write_then_readinto(cmd, buf, out_end=1)
+                for k in (0, 2, 4):
+                    v = buf[k] | (buf[k + 1] << 8)
+                    if v > 32767:
+                        v -= 65536
+                    out[j] = v
+                    j += 1
+        self.reads += n + 1
+        return n
+
+
+class Adxl345Activity(_Registers):
+    """
+    Activity interrupt on X. The sensor raises INT1 once |x| passes the
+    threshold; without a wired INT1 pin we poll INT_SOURCE (one byte)
+    instead of reading samples.
+    """
+
+    def __init__(self, i2c, int_pin=None, address=ADDRESS):
+        super().__init__(i2c, address)
+        self.int_pin = int_pin   # digitalio input on INT1, or None
+
+    def arm(self, threshold):
+        """Enable the activity interrupt for |x| > threshold (m/s^2)."""
+        counts = int(threshold / ACT_SCALE)
+        if counts < 1:
+            counts = 1
+        elif counts > 255:
+            counts = 255
+        self._write(REG_INT_ENABLE, 0)          # disable while setting up
+        self._write(REG_ACT_INACT_CTL, ACT_DC_X)
+        self._write(REG_THRESH_ACT, counts)
+        self._write(REG_INT_MAP, 0)             # everything on INT1
+        self._read_byte(REG_INT_SOURCE)         # clear an old event
+        self._write(REG_INT_ENABLE, INT_ACTIVITY)
+
+    def disarm(self):
+        self._write(REG_INT_ENABLE, 0)
+
+    def triggered(self):
+        """True once activity was signalled (reading INT_SOURCE clears it)."""
+        if self.int_pin is not None and not self.int_pin.value:
+            return False    # INT1 low: nothing happened, no bus traffic
+        return bool(self._read_byte(REG_INT_SOURCE) & INT_ACTIVITY)
+
+
+class Adxl345Axis(_Registers):
+    """X only, in bypass mode: one 2-byte read of DATAX0..DATAX1."""
+
+    def read_x(self):
+        """Raw X count."""
+        cmd = self.cmd
+        buf = self.buf
+        cmd[0] = REG_DATAX0
+        with self.device as dev:
+            dev.write_then_readinto(cmd, buf, out_end=1, in_end=2)
+        self.reads += 1
+        self.sessions += 1
+        v = buf[0] | (buf[1] << 8)
+        if v > 32767:
+            v -= 65536
+        return v
@@ -0,0 +1,31 @@
+import gc
+import time
+
+# =========================
+#  Benchmark helper
+# =========================
+#
+# Shared by filterBench.py and hudBench.py (host or device: copy it next
+# to them). Heap use is only measured where gc.mem_alloc() exists
+# (CircuitPython).
+
+
+def measure(fn, count=1, warm_up=False):
+    """
+    Run fn() once with the GC off. Returns (microseconds, heap bytes or
+    None), both per `count` (the samples or games one fn() call covers).
+    With warm_up fn() runs once untimed first (list growth etc.).
+    """
+    mem_alloc = getattr(gc, "mem_alloc", None)
+    if warm_up:
+        fn()
+    gc.collect()
+    gc.disable()
+    before = mem_alloc() if mem_alloc else 0
+    start = time.monotonic_ns()
+    fn()
+    elapsed = time.monotonic_ns() - start
+    after = mem_alloc() if mem_alloc else 0
+    gc.enable()
+    heap = (after - before) / count if mem_alloc else None
+    return elapsed / 1000 / count, heap
@@ -0,0 +1,280 @@
+import array
+import struct
+
+# =========================
+#  Accelerometer calibration
+# =========================
+#
+# The baseline is the mean x, y, z while the player holds the device
+# still. Calibrator keeps a running mean and variance per axis (Welford),
+# so it can stop as soon as the samples are steady instead of after a
+# fixed count:
+#   - from WARMUP samples on, a sample more than OUTLIER_SIGMA standard
+#     deviations (and at least OUTLIER_MIN) off the mean is rejected, so
+#     a twitch does not move the baseline
+#   - REJECT_RUN rejects in a row (the device moved to a new pose), or
+#     MIN_SAMPLES that are not steady, start the statistics again
+#   - MIN_SAMPLES steady samples (standard deviation <= STILL_STD on
+#     every axis) finish it; MAX_SAMPLES ends it anyway.
+# The last steady baseline is kept in raw counts (pack() / unpack(); the
+# backend stores it in NVM). When the first QUICK_SAMPLES steady samples
+# are within POSE_TOL of it, it is taken as it is.
+#
+# During the game DriftTracker moves the X baseline slowly (time constant
+# in seconds) after the player's grip, from the samples taken while the
+# device is at rest, and never more than a small budget away from the
+# calibrated one.
+
+WARMUP = 5
+MIN_SAMPLES = 16         # 160 ms at 100 Hz
+QUICK_SAMPLES = 8        # enough to recognise the saved pose
+MAX_SAMPLES = 100
+STILL_STD = 0.2          # m/s^2
+OUTLIER_SIGMA = 4.0
+OUTLIER_MIN = 0.5        # m/s^2, noise is well below this
+REJECT_RUN = 5
+POSE_TOL = 0.5           # m/s^2 per axis, about 3 degrees
+
+# Saved baseline: magic, x, y, z in raw counts
+CACHE = "<4shhh"
+CACHE_SIZE = struct.calcsize(CACHE)
+CACHE_MAGIC = b"ACAL"
+
+# How a calibration ended
+STEADY = 0
+CACHED = 1
+TIMEOUT = 2
+RESULT_NAMES = ("steady", "saved pose", "not steady")
+
+
+def pack(counts):
+    """Bytes to save for a baseline in raw counts."""
+    return struct.pack(CACHE, CACHE_MAGIC, counts[0], counts[1], counts[2])
+
+
+def unpack(data):
+    """Raw counts from pack()'s bytes, or None if nothing was saved."""
+    if len(data) < CACHE_SIZE:
+        return None
+    magic, x, y, z = struct.unpack_from(CACHE, data, 0)
+    if magic != CACHE_MAGIC:
+        return None
+    return x, y, z
+
+
+class Calibrator:
+    """
+    Baseline x, y, z (m/s^2) from samples fed one at a time to add().
+    `scale` is m/s^2 per raw count, for the saved baseline.
+    """
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.mean = array.array("f", (0.0, 0.0, 0.0))
+        self.m2 = array.array("f", (0.0, 0.0, 0.0))   # sums of squared deviations
+        self.n = 0
+        self.baseline = array.array("f", (0.0, 0.0, 0.0))
+        self.cached = None
+        self.result = TIMEOUT
+        self.seen = 0            # samples given to add()
+        self.rejected = 0
+        self.restarts = 0
+        self.run = 0             # rejects in a row
+        self.time_ms = 0         # set by the caller
+
+    def start(self, cached=None):
+        """New calibration; `cached` is the saved baseline in raw counts, or None."""
+        self.cached = cached
+        self.seen = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._clear()
+
+    def _clear(self):
+        for axis in range(3):
+            self.mean[axis] = 0.0
+            self.m2[axis] = 0.0
+        self.n = 0
+        self.run = 0
+
+    def _restart(self):
+        self._clear()
+        self.restarts += 1
+
+    def _outlier(self, x, y, z):
+        mean = self.mean
+        m2 = self.m2
+        n1 = self.n - 1
+        for axis, v in ((0, x), (1, y), (2, z)):
+            band = OUTLIER_SIGMA * (m2[axis] / n1) ** 0.5
+            if band < OUTLIER_MIN:
+                band = OUTLIER_MIN
+            if abs(v - mean[axis]) > band:
+                return True
+        return False
+
+    def steady(self):
+        """True if every axis varies by STILL_STD or less."""
+        if self.n < 2:
+            return False
+        limit = STILL_STD * STILL_STD * (self.n - 1)
+        m2 = self.m2
+        return m2[0] <= limit and m2[1] <= limit and m2[2] <= limit
+
+    def _matches_cache(self):
+        scale = self.scale
+        for axis in range(3):
+            if abs(self.mean[axis] - self.cached[axis] * scale) > POSE_TOL:
+                return False
+        return True
+
+    def _finish(self, result):
+        self.result = result
+        b = self.baseline
+        if result == CACHED:
+            scale = self.scale
+            for axis in range(3):
+                b[axis] = self.cached[axis] * scale
+        else:
+            for axis in range(3):
+                b[axis] = self.mean[axis]
+        return True
+
+    def add(self, x, y, z):
+        """Take one sample in m/s^2. Returns True once the baseline is known."""
+        self.seen += 1
+        if self.n >= WARMUP and self._outlier(x, y, z):
+            self.rejected += 1
+            self.run += 1
+            if self.run >= REJECT_RUN:
+                self._restart()
+        else:
+            self.run = 0
+            self.n += 1
+            mean = self.mean
+            m2 = self.m2
+            for axis, v in ((0, x), (1, y), (2, z)):
+                d = v - mean[axis]
+                mean[axis] += d / self.n
+                m2[axis] += d * (v - mean[axis])
+                if m2[axis] < 0.0:
+                    m2[axis] = 0.0    # float32 rounding when a sample hits the mean
+            if self.n == QUICK_SAMPLES and self.cached is not None \
+                    and self.steady() and self._matches_cache():
+                return self._finish(CACHED)
+            if self.n >= MIN_SAMPLES:
+                if self.steady():
+                    return self._finish(STEADY)
+                self._restart()
+        if self.seen >= MAX_SAMPLES and self.n > 0:
+            return self._finish(TIMEOUT)
+        return False
+
+    def counts(self):
+        """The baseline in raw counts (for saving and recording)."""
+        scale = self.scale
+        b = self.baseline
+        return int(round(b[0] / scale)), int(round(b[1] / scale)), int(round(b[2] / scale))
+
+    def std(self, axis):
+        if self.n < 2:
+            return 0.0
+        return (self.m2[axis] / (self.n - 1)) ** 0.5
+
+    def report(self):
+        return ("calibration: {}, {} ms, {} samples ({} rejected, {} restarts), "
+                "std {:.2f}/{:.2f}/{:.2f} m/s^2").format(
+            RESULT_NAMES[self.result], self.time_ms, self.seen, self.rejected,
+            self.restarts, self.std(0), self.std(1), self.std(2))
+
+
+class DriftTracker:
+    """
+    Follows the X baseline while the device is at rest, for a player who
+    changes their grip during a game. update() takes the filtered X
+    (m/s^2) and the time it covers (s), and is O(1): a value that moved
+    by more than `still` since the last one means the device is moving,
+    and the next SETTLE seconds are skipped as well; a value more than
+    `band` (the caller may change it) off the tracked baseline is a tilt,
+    not drift. Otherwise x follows it with time constant `tau`, but never
+    further than `budget` from the calibrated baseline: past that it is a
+    lean to be reported as a tilt (counted in `over`; many of them mean
+    the device wants a new calibration).
+    """
+
+    SETTLE = 0.1             # s
+
+    def __init__(self, band, budget, tau=5.0, still=0.08):
+        self.band = band
+        self.budget = budget
+        self.tau = tau
+        self.still = still
+        self.origin = 0.0        # calibrated baseline
+        self.x = 0.0             # tracked baseline
+        self.prev = None         # last value, None after a filter restart
+        self.settle = 0.0
+        self.max_drift = 0.0
+        self.used = 0            # values that moved the baseline
+        self.moving = 0
+        self.outside = 0
+        self.over = 0            # values held back by the budget
+
+    def start(self, x):
+        """New game: track from the calibrated baseline x."""
+        self.origin = x
+        self.x = x
+        self.prev = None
+        self.settle = 0.0
+        self.max_drift = 0.0
+        self.used = 0
+        self.moving = 0
+        self.outside = 0
+        self.over = 0
+
+    def restart_stream(self):
+        """The filter was restarted: the next value is not a step from the last."""
+        self.prev = None
+
+    def update(self, value, dt):
+        prev = self.prev
+        self.prev = value
+        if prev is None:
+            return
+        if abs(value - prev) > self.still:
+            self.moving += 1
+            self.settle = self.SETTLE
+            return
+        if self.settle > 0.0:
+            self.settle -= dt
+            self.moving += 1
+            return
+        off = value - self.x
+        if off > self.band or off < -self.band:
+            self.outside += 1
+            return
+        k = dt / self.tau
+        if k > 1.0:
+            k = 1.0
+        x = self.x + k * off
+        lo = self.origin - self.budget
+        hi = self.origin + self.budget
+        if x > hi:
+            x = hi
+            self.over += 1
+        elif x < lo:
+            x = lo
+            self.over += 1
+        self.x = x
+        self.used += 1
+        drift = abs(x - self.origin)
+        if drift > self.max_drift:
+            self.max_drift = drift
+
+    def drift(self):
+        """Tracked minus calibrated baseline, m/s^2."""
+        return self.x - self.origin
+
+    def report(self):
+        return ("baseline drift: {:+.2f} m/s^2 (max {:.2f}), {} rest samples used, "
+                "{} moving, {} off level, {} past the drift budget").format(
+            self.drift(), self.max_drift, self.used, self.moving, self.outside, self.over)
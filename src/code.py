@@ -1,275 +1,765 @@
-import time
-import random
-import board
-import busio
-import digitalio
-import displayio
-import terminalio
-
-from adafruit_display_text import label
-import i2cdisplaybus
-import adafruit_displayio_ssd1306
-import adafruit_adxl34x
-from neopixel import NeoPixel
+# The boot timeline starts here, before any import: on the device with
+# time.monotonic_ns() (the clock hw.monotonic_ns() uses), in the
+# simulator with the injected backend's virtual clock.
+if "hw" in globals():
+    boot_start_ns = hw.monotonic_ns()
+else:
+    import time
+    boot_start_ns = time.monotonic_ns()
 
 # =========================
 #  Hardware setup
 # =========================
 
-# --- Display (OLED 128x64, I2C D5/D4) ---
-displayio.release_displays()
-i2c = busio.I2C(board.D5, board.D4)  # SCL=D5, SDA=D4
-
-display_bus = i2cdisplaybus.I2CDisplayBus(i2c, device_address=0x3C)
-display = adafruit_displayio_ssd1306.SSD1306(display_bus, width=128, height=64)
-
-main_group = displayio.Group()
-
-line1 = label.Label(terminalio.FONT, text="", anchor_point=(0, 0),
-                    anchored_position=(0, 0))
-line2 = label.Label(terminalio.FONT, text="", anchor_point=(0, 0),
-                    anchored_position=(0, 16))
-line3 = label.Label(terminalio.FONT, text="", anchor_point=(0, 0),
-                    anchored_position=(0, 32))
-# add LIVES: *** at the bootom of screen
-line_lives = label.Label(terminalio.FONT, text="", anchor_point=(0, 0),
-                         anchored_position=(0, 48))
-
-main_group.append(line1)
-main_group.append(line2)
-main_group.append(line3)
-main_group.append(line_lives) 
-display.root_group = main_group
+# All pins, the OLED, the ADXL345 and the NeoPixel live behind `hw`.
+# simulator.load_game() injects a SimBackend before this module runs;
+# on the device we build the real CircuitPython backend here.
+# Only the OLED is started at first (see "Staged startup" below).
+if "hw" not in globals():
+    from hardware import HardwareBackend
+    hw = HardwareBackend()
+boot_display_ns = hw.monotonic_ns()
+
+# First frame before anything else is imported or set up: the splash is
+# drawn straight through the backend, and nothing else uses the bus yet,
+# so its pages are sent right away.
+SPLASH = ("RETRO REACTOR", "   90s ARCADE STYLE", "   >> START FUN <<", "")
+for row in range(len(SPLASH)):
+    hw.set_line(row, SPLASH[row])
+hw.refresh()
+while hw.bus.pending:
+    hw.bus.pump()
+boot_frame_ns = hw.monotonic_ns()
+
+# The rest of the game is imported after the first frame
+import array
+import random
 
+from accel import LowPassFilter
+from adxl345 import FIFO_SIZE, SCALE as ACCEL_SCALE   # m/s^2 per raw count
+import calibration
+from encoder import QuadratureDecoder
+import events
+from hud import MOVE_LABELS, Hud
+from memory import GcManager
+from led import LedEffects
+from profiler import Profiler
+import replay
+from scheduler import Scheduler
+from screen import DisplayManager
+from telemetry import BootTimeline, MoveTelemetry
+
+boot = BootTimeline(hw.monotonic_ns, boot_start_ns)
+boot.mark("display", boot_display_ns)
+boot.mark("first_frame", boot_frame_ns)
+boot.mark("imports")
+
+# Set REPLAY to a recording (see "Session recording") to play that game
+# again from its recorded inputs instead of the real ones.
+if "REPLAY" not in globals():
+    REPLAY = None
+if REPLAY is not None:
+    hw = replay.ReplayBackend(hw, replay.load(REPLAY))
+
+# Set PROFILE = True (or inject it, like hw) to time the hot paths below;
+# with it off the @profiled functions are left unwrapped.
+if "PROFILE" not in globals():
+    PROFILE = False
+profiler = Profiler(PROFILE)
+profiled = profiler.section
+
+# Only changed labels are touched; the "display" task refreshes once
+# for all changes made since its last run. The splash is already shown.
+display = DisplayManager(hw, SPLASH)
+
+@profiled("show_text")
 def show_text(l1="", l2="", l3=""):
     """Show up to 3 lines of text on the OLED (menus, opening)."""
-    line1.text = l1
-    line2.text = l2
-    line3.text = l3
     # open screen doesn't add LIVES
-    line_lives.text = ""
-
-# --- Accelerometer ADXL345 (same I2C on D5/D4) ---
-i2c_accel = i2c
-accel = adafruit_adxl34x.ADXL345(i2c_accel)
-
-# --- Rotary Encoder: A=D0, B=D6, SW=D7 ---
-clk = digitalio.DigitalInOut(board.D0)
-clk.direction = digitalio.Direction.INPUT
-clk.pull = digitalio.Pull.UP
+    display.show(l1, l2, l3, "")
 
-dt = digitalio.DigitalInOut(board.D6)
-dt.direction = digitalio.Direction.INPUT
-dt.pull = digitalio.Pull.UP
-
-enc_sw = digitalio.DigitalInOut(board.D7)
-enc_sw.direction = digitalio.Direction.INPUT
-enc_sw.pull = digitalio.Pull.UP  # pressed -> False
+@profiled("update_display")
+def update_display(now):
+    """Scheduler task: push the labels to the OLED only when they changed."""
+    display.refresh()
 
 # Encoder button state for "click" event detection
-last_enc_sw = enc_sw.value  # True = released, False = pressed
-
-# --- Push Button: D8 ---
-button = digitalio.DigitalInOut(board.D8)
-button.direction = digitalio.Direction.INPUT
-button.pull = digitalio.Pull.UP  # pressed -> False
+# (the pins are read once they are started, in devices_ready())
+last_enc_sw = True                 # True = released, False = pressed
+enc_sw_changed_ns = 0              # when last_enc_sw last changed
 
 # Push button state for "click" event detection
-last_button_state = button.value  # True = released, False = pressed
+last_button_state = True               # True = released, False = pressed
+button_changed_ns = 0                  # when last_button_state last changed
+
+# Contact bounce: after a pin changes, its changes are ignored for this
+# long. Longer than the switches bounce, shorter than a quick tap.
+DEBOUNCE_NS = 15000000     # 15 ms
+
+# Presses count only once every button has been released since the
+# prompt (clear_input_events()), so a button still held from the last
+# move does not answer or fail the next one.
+buttons_armed = True
 
-# --- NeoPixel: D1, 1 LED ---
-pixel = NeoPixel(board.D1, 1, auto_write=True)
-pixel.brightness = 0.3
+# Turns, presses and tilt crossings with their times, for wait_for_move
+input_events = events.EventQueue(16)
 
 # =========================
 #  Helper: NeoPixel colors
 # =========================
 
+# Timed effects run on top of a base color; the pixel is only written
+# when its color changes.
+leds = LedEffects(hw.set_pixel, hw.monotonic)
+
+@profiled("set_color")
 def set_color(r, g, b):
-    """Set NeoPixel to a solid color."""
-    pixel[0] = (r, g, b)
+    """Set NeoPixel to a solid color (shown after any running effect)."""
+    leds.set_base((r, g, b))
 
+@profiled("flash_color")
 def flash_color(r, g, b, t=0.15):
-    """Flash NeoPixel with a color for a short time and restore previous color."""
-    old = pixel[0]
-    pixel[0] = (r, g, b)
-    time.sleep(t)
-    pixel[0] = old
+    """
+    Flash NeoPixel with a color for a short time and restore previous color.
+    Does not block: the "led" task restores the color when the time is up.
+    """
+    leds.flash((r, g, b), t)
+
+@profiled("update_led")
+def update_led(now):
+    """Scheduler task: advance the running LED effect."""
+    leds.update(now)
 
 # =========================
 #  Encoder: button click
 # =========================
 
-def encoder_clicked():
+@profiled("poll_encoder_button")
+def poll_encoder_button(now=None):
     """
-    Detect a single 'click' event of the encoder button.
-    We treat a transition from released -> pressed as one click.
+    Sample the encoder button and count released -> pressed edges.
+    Called on every tick (while watched, see input_plan()) so short
+    presses are never missed.
     """
-    global last_enc_sw
-    current = enc_sw.value
-    clicked = False
+    global last_enc_sw, enc_sw_changed_ns, buttons_armed
+    current = hw.encoder_switch()
+    if current == last_enc_sw:
+        return
+    now_ns = hw.monotonic_ns()
+    if now_ns - enc_sw_changed_ns < DEBOUNCE_NS:
+        return
+    recorder.add_at(now_ns, replay.ENC_SW, current)
     # released (True) -> pressed (False)
-    if last_enc_sw and (not current):
-        clicked = True
+    if last_enc_sw and buttons_armed:
+        input_events.push(events.PUSH_ENC, now_ns)
     last_enc_sw = current
-    return clicked
+    enc_sw_changed_ns = now_ns
+    if current and last_button_state:
+        buttons_armed = True
 
 # =========================
-#  Encoder: state-machine for rotation
+#  Encoder: rotation from the position counter
 # =========================
+#
+# The backend counts quadrature edges on its own (rotaryio hardware
+# counter, or a background edge queue), so fast spins between two ticks
+# are not lost. Here we only turn the position delta into turn events.
 
-def read_encoder_state():
-    """Read encoder AB pins as a 2-bit state: value 0..3."""
-    a = 1 if clk.value else 0
-    b = 1 if dt.value else 0
-    # (a << 1) | b gives: 0b00, 0b01, 0b10, 0b11
-    return (a << 1) | b
-
-# Transition table for a standard quadrature encoder.
-# Keys: previous_state -> {current_state: "CW"/"CCW"}
-transition_table = {
-    0b00: {0b01: "CW",  0b10: "CCW"},
-    0b01: {0b11: "CW",  0b00: "CCW"},
-    0b11: {0b10: "CW",  0b01: "CCW"},
-    0b10: {0b00: "CW",  0b11: "CCW"},
-}
-
-last_enc_state = read_encoder_state()
-cw_steps = 0
-ccw_steps = 0
 STEPS_PER_TURN = 2   # require 2 valid transitions before we accept a turn
+encoder = QuadratureDecoder(steps_per_detent=STEPS_PER_TURN)
 
 def encoder_reset_turns():
     """Reset accumulated CW/CCW steps before waiting for a new rotation move."""
-    global cw_steps, ccw_steps
-    cw_steps = 0
-    ccw_steps = 0
-
+    encoder.reset_turns()
+
+@profiled("poll_encoder")
+def poll_encoder(now=None):
+    """Read the encoder position delta once. Called on every tick (while watched)."""
+    queued = len(encoder.turns)
+    delta = encoder.feed_position(hw.encoder_position(), now)
+    if not delta:
+        return
+    now_ns = hw.monotonic_ns()
+    recorder.add_at(now_ns, replay.ENC, delta)
+    turns = encoder.turns
+    for i in range(queued, len(turns)):
+        input_events.push(events.TURN_CW if turns[i] == "CW" else events.TURN_CCW, now_ns)
+
+@profiled("encoder_read_turn")
 def encoder_read_turn():
     """
-    Check encoder rotation using the state machine.
+    Return one rotation accumulated by poll_encoder().
     Returns:
         "CW"  - when a stable clockwise turn is detected,
         "CCW" - when a stable counter-clockwise turn is detected,
-        None  - if no full turn is detected this call.
+        None  - if no full turn is detected since the last call.
     """
-    global last_enc_state, cw_steps, ccw_steps
+    return encoder.read_turn()
 
-    current_state = read_encoder_state()
+# =========================
+#  Button reading
+# =========================
 
-    if current_state != last_enc_state:
-        # Small delay to reduce mechanical bounce
-        time.sleep(0.001)
-        stable_state = read_encoder_state()
+@profiled("poll_button")
+def poll_button(now=None):
+    """
+    Sample the separate push button (D8); a released -> pressed edge is
+    a PUSH_BTN event. Called on every tick (while watched, see
+    input_plan()) so short presses are never missed.
+    """
+    global last_button_state, button_changed_ns, buttons_armed
+    current = hw.button_value()
+    if current == last_button_state:
+        return
+    now_ns = hw.monotonic_ns()
+    if now_ns - button_changed_ns < DEBOUNCE_NS:
+        return
+    recorder.add_at(now_ns, replay.BUTTON, current)
+    # released (True) -> pressed (False)
+    if last_button_state and buttons_armed:
+        input_events.push(events.PUSH_BTN, now_ns)
+    last_button_state = current
+    button_changed_ns = now_ns
+    if current and last_enc_sw:
+        buttons_armed = True
 
-        if stable_state != last_enc_state:
-            dir_map = transition_table.get(last_enc_state, {})
-            direction = dir_map.get(stable_state, None)
+def clear_input_events():
+    """
+    Drop clicks, turns and events from before a new prompt was shown, and
+    ignore presses until both buttons are up.
+    """
+    global buttons_armed
+    buttons_armed = last_enc_sw and last_button_state
+    encoder_reset_turns()
+    input_events.clear()
 
-            if direction == "CW":
-                cw_steps += 1
-                ccw_steps = 0  # reset opposite direction
-            elif direction == "CCW":
-                ccw_steps += 1
-                cw_steps = 0
-            else:
-                # Invalid jump / noise
-                cw_steps = 0
-                ccw_steps = 0
+def poll_inputs(now):
+    """Scheduler task: sample every digital input on every tick."""
+    poll_encoder(now)
+    poll_encoder_button()
+    poll_button()
 
-            last_enc_state = stable_state
+# =========================
+#  Accelerometer calibration / filtering
+# =========================
 
-            if cw_steps >= STEPS_PER_TURN:
-                cw_steps = 0
-                ccw_steps = 0
-                return "CW"
-            if ccw_steps >= STEPS_PER_TURN:
-                cw_steps = 0
-                ccw_steps = 0
-                return "CCW"
+alpha = 0.2  # low-pass filter factor
 
-    return None
+# Stream mode: the ADXL345 FIFO collects samples at ACCEL_RATE and the
+# "accel" task drains them all at once, instead of one I2C read per tick.
+ACCEL_STREAM = True
+ACCEL_RATE = 100            # Hz, same rate the filter was tuned for
+ACCEL_DRAIN_PERIOD = 0.02   # FIFO drain interval in stream mode
+accel_raw = array.array("h", [0] * (3 * FIFO_SIZE))   # one full FIFO, x/y/z interleaved
+
+# Both are updated in place (no new lists per sample). In stream mode
+# the filter runs in fixed point on raw counts, otherwise on m/s^2.
+accel_baseline = array.array("f", (0.0, 0.0, 0.0))
+accel_lpf = LowPassFilter(alpha, fixed=ACCEL_STREAM, scale=ACCEL_SCALE)
+
+# Tilt detection based on X axis:
+# left tilt  = X becomes larger than baseline
+# right tilt = X becomes smaller than baseline
+TILT_TH = 2.0  # threshold, can be tuned by feel
+TILT_REARM = TILT_TH / 2   # back within this of the baseline: the tilt is over
+
+# Running mean / variance with outlier rejection, done as soon as the
+# samples are steady (calibration.py). A steady baseline is saved by the
+# backend (NVM on the device), and the next game takes it after a few
+# samples if the device is held the same way.
+calibrator = calibration.Calibrator(ACCEL_SCALE)
+
+# After calibration the X baseline follows slow changes of grip, from
+# the samples taken at rest: level intros and non-tilt moves (see
+# track_drift()). Values further off than the band are tilts, not drift:
+# TILT_TH in a level intro, where nobody tilts on purpose, TILT_REARM
+# during a move. The baseline follows with a DRIFT_TAU time constant and
+# stays within DRIFT_BUDGET of the calibrated one (below TILT_REARM): a
+# slow lean past that is still a tilt.
+DRIFT_TAU = 5.0        # s
+DRIFT_BUDGET = 0.75    # m/s^2, about 4 degrees
+drift = calibration.DriftTracker(TILT_REARM, DRIFT_BUDGET, DRIFT_TAU)
+
+def calibrate_accel():
+    """Compute the baseline for x, y, z while the device is held still."""
+    global accel_recorded
+    accel_task.enabled = False  # we read the sensor ourselves while calibrating
+    accel_recorded = True
+    accel_flush()
+    start_ns = sync_point(replay.CALIBRATE)
+    saved = hw.load_baseline()
+    if saved is not None:
+        recorder.add_at(start_ns, replay.SAVED, saved[0], saved[1], saved[2])
+    calibrator.start(saved)
+    done = False
+    while not done:
+        if ACCEL_STREAM:
+            n = read_accel_fifo()
+            for i in range(0, 3 * n, 3):
+                if calibrator.add(accel_raw[i] * ACCEL_SCALE, accel_raw[i + 1] * ACCEL_SCALE,
+                                  accel_raw[i + 2] * ACCEL_SCALE):
+                    done = True
+                    break
+        else:
+            x, y, z = read_accel()
+            done = calibrator.add(x, y, z)
+        if not done:
+            # keeps the "HOLD STILL" screen refreshed
+            scheduler.run_for(ACCEL_DRAIN_PERIOD if ACCEL_STREAM else 1 / ACCEL_RATE)
+    accel_task.enabled = not ACCEL_WAKE
+    accel_recorded = not ACCEL_WAKE
+    now_ns = hw.monotonic_ns()
+    calibrator.time_ms = (now_ns - start_ns) // 1000000
+    counts = calibrator.counts()
+    recorder.add_at(now_ns, replay.BASELINE, counts[0], counts[1], counts[2])
+    if calibrator.result == calibration.STEADY:
+        hw.save_baseline(counts)
+    baseline = calibrator.baseline
+    accel_baseline[0] = baseline[0]
+    accel_baseline[1] = baseline[1]
+    accel_baseline[2] = baseline[2]
+    drift.start(baseline[0])
+    reset_accel_filter()  # initialize filter with baseline
+
+# Only samples that can decide a move are recorded: calibration, the
+# level intros (they move the baseline) and, with ACCEL_WAKE, the move
+# windows (the filter restarts at each one).
+# Without ACCEL_WAKE the filter runs on, so every sample after the
+# calibration is recorded (before it nothing depends on the samples).
+accel_recorded = False
+
+def read_accel():
+    """One reading in m/s^2 (recorded when accel_recorded)."""
+    x, y, z = hw.acceleration()
+    if accel_recorded:
+        recorder.accel(hw.monotonic_ns(), x, y, z)
+    return x, y, z
+
+def read_accel_x():
+    """X only in m/s^2, 2 bytes over I2C (poll mode). Recorded like read_accel()."""
+    x = hw.acceleration_x()
+    if accel_recorded:
+        recorder.accel(hw.monotonic_ns(), x, 0.0, 0.0)
+    return x
+
+def read_accel_fifo():
+    """Drain the FIFO into accel_raw (recorded when accel_recorded). Returns the count."""
+    n = hw.accel_fifo_into(accel_raw)
+    if n and accel_recorded:
+        recorder.accel_raw(hw.monotonic_ns(), accel_raw, n)
+    return n
+
+def accel_flush():
+    """Drop the samples the FIFO buffered while nobody drained it (stream mode)."""
+    if ACCEL_STREAM:
+        hw.accel_fifo_clear()
+
+def reset_accel_filter():
+    """Restart the low-pass filter from the baseline (device at rest)."""
+    accel_lpf.reset(accel_baseline[0], accel_baseline[1], accel_baseline[2])
+    drift.restart_stream()
+
+@profiled("read_filtered_accel")
+def read_filtered_accel():
+    """Read acceleration and apply a simple low-pass filter (float mode)."""
+    x, y, z = read_accel()
+    accel_lpf.update(x, y, z)
+    return accel_lpf
+
+accel_ns = 0   # when accel_lpf last took in new samples
+accel_x_only = False   # during moves only X is read / filtered
+tilt_side = 0  # +1 tilted left, -1 tilted right, 0 level (see check_tilt())
+accel_resting = False  # samples may move the baseline (track_drift())
+
+def check_tilt(now_ns):
+    """
+    Push a TILT_LEFT / TILT_RIGHT event when the filtered X crosses
+    TILT_TH from level. It has to come back within TILT_REARM of the
+    baseline before the same side counts again.
+    """
+    global tilt_side
+    dx = accel_lpf.get(0) - accel_baseline[0]
+    if dx > TILT_TH:
+        side = 1
+    elif dx < -TILT_TH:
+        side = -1
+    elif -TILT_REARM < dx < TILT_REARM:
+        side = 0
+    else:
+        return
+    if side != tilt_side:
+        tilt_side = side
+        if side > 0:
+            input_events.push(events.TILT_LEFT, now_ns)
+        elif side < 0:
+            input_events.push(events.TILT_RIGHT, now_ns)
+
+@profiled("sample_accel")
+def sample_accel(now):
+    """Scheduler task: keep accel_lpf up to date at a fixed rate."""
+    global accel_awake, accel_ns
+    if not accel_awake:
+        if not hw.accel_activity():
+            return
+        recorder.add(replay.ACTIVITY)
+        # In stream mode the FIFO still holds the samples leading up to it
+        accel_awake = True
+    if ACCEL_STREAM:
+        # FIFO entries are always read whole (6 bytes), filtering can skip Y, Z
+        n = hw.accel_fifo_into(accel_raw)
+        if not n:
+            return
+        accel_ns = hw.monotonic_ns()
+        if accel_recorded:
+            recorder.accel_raw(accel_ns, accel_raw, n)
+        if accel_x_only:
+            accel_lpf.update_raw_x(accel_raw, n)
+        else:
+            accel_lpf.update_raw(accel_raw, n)
+    else:
+        if accel_x_only:
+            accel_lpf.update_x(read_accel_x())
+        else:
+            read_filtered_accel()
+        accel_ns = hw.monotonic_ns()
+    check_tilt(accel_ns)
+    if accel_resting:
+        track_drift(n / ACCEL_RATE if ACCEL_STREAM else accel_task.period)
+
+def track_drift(dt):
+    """
+    Let the X baseline follow the player's grip (calibration.DriftTracker);
+    dt is the time (s) the new filtered value covers.
+    """
+    drift.update(accel_lpf.get(0), dt)
+    accel_baseline[0] = drift.x
+
+def set_accel_stream(enable):
+    """Switch between FIFO stream mode and one read per ACCEL_PERIOD."""
+    global ACCEL_STREAM
+    ACCEL_STREAM = enable
+    recorder.stream = enable
+    hw.accel_stream(enable, ACCEL_RATE)
+    accel_lpf.set_fixed(enable)  # raw counts in stream mode
+    accel_task.period = ACCEL_DRAIN_PERIOD if enable else ACCEL_PERIOD
+
+# During a move the ADXL345 activity interrupt gates sampling: the
+# "accel" task only reads samples once the sensor reports movement.
+ACCEL_WAKE = True
+accel_awake = True    # False while waiting for the activity interrupt
+accel_armed = False
+
+def activity_threshold():
+    """
+    Smallest |x| a real tilt can reach: min |baseline_x +/- TILT_TH|.
+    The sensor wakes us at that level; the exact dx check stays in software.
+    """
+    bx = accel_baseline[0]
+    return min(abs(bx + TILT_TH), abs(bx - TILT_TH))
+
+def accel_plan(expected_move):
+    """
+    Pick how the accelerometer is sampled while waiting for a move:
+      - TILT_*, or any move with FAIL_FAST (a tilt would be a wrong move):
+        X only, at the output data rate (ACCEL_RATE)
+      - with ACCEL_WAKE: arm the activity interrupt, sample after it fires
+      - other moves without FAIL_FAST: don't sample at all
+    Outside tilt moves the samples also let the baseline follow the grip.
+    """
+    global accel_awake, accel_armed, accel_recorded, accel_x_only, tilt_side, accel_resting
+    tilt = expected_move == "TILT_LEFT" or expected_move == "TILT_RIGHT"
+    accel_resting = not tilt
+    if not FAIL_FAST and not tilt:
+        accel_task.enabled = False
+        return
+    accel_task.enabled = True
+    accel_task.period = 1 / ACCEL_RATE
+    accel_x_only = True
+    tilt_side = 0   # a tilt still held from before counts again (as a new event)
+    if ACCEL_WAKE:
+        accel_flush()   # samples from before the prompt
+        hw.accel_activity_arm(activity_threshold())
+        accel_armed = True
+        accel_awake = False
+        accel_recorded = True
+        # Filter restarts from rest; stale values must not count as a tilt
+        reset_accel_filter()
+
+def accel_plan_done():
+    """
+    Between moves: with ACCEL_WAKE nothing needs samples (each tilt
+    window starts from the baseline), else sample continuously.
+    """
+    global accel_awake, accel_armed, accel_recorded, accel_x_only, accel_resting
+    if accel_armed:
+        hw.accel_activity_disarm()
+        accel_armed = False
+    accel_recorded = not ACCEL_WAKE
+    accel_resting = not ACCEL_WAKE
+    drift.band = TILT_REARM
+    accel_awake = True
+    accel_x_only = False
+    accel_task.period = ACCEL_DRAIN_PERIOD if ACCEL_STREAM else ACCEL_PERIOD
+    accel_task.enabled = not ACCEL_WAKE
+
+REST_PERIOD = 0.02   # accel task period in level intros
+REST_WINDOW = 0.5    # s at the end of a level intro that is sampled
+
+def rest_plan():
+    """
+    End of a level intro: the device is at rest, so sample X at a low
+    rate and let the baseline follow the grip. accel_plan_done() ends it.
+    """
+    global accel_recorded, accel_x_only, accel_resting
+    accel_flush()
+    reset_accel_filter()
+    accel_task.enabled = True
+    accel_task.period = REST_PERIOD
+    accel_x_only = True
+    accel_resting = True
+    accel_recorded = True
+    drift.band = TILT_TH
+
+accel_stats_start = (0.0, (0, 0, 0))
+
+def reset_accel_stats():
+    """Start a new measurement window for print_accel_stats()."""
+    global accel_stats_start
+    accel_stats_start = (hw.monotonic(), hw.accel_bus_stats())
+
+def print_accel_stats():
+    """Print accelerometer samples/s and I2C traffic/s since reset_accel_stats()."""
+    start_time, start = accel_stats_start
+    elapsed = hw.monotonic() - start_time
+    if elapsed <= 0:
+        return
+    now = hw.accel_bus_stats()
+    print("accel ({}): {:.0f} samples/s, {:.0f} I2C reads/s, {:.0f} bus sessions/s".format(
+        "stream" if ACCEL_STREAM else "poll",
+        (now[0] - start[0]) / elapsed,
+        (now[1] - start[1]) / elapsed,
+        (now[2] - start[2]) / elapsed))
 
 # =========================
-#  Button reading
+#  Input plan per move
 # =========================
+#
+# While a move is shown only its own input is watched: the encoder for
+# TURN_*, the one pin for PUSH_*, the accelerometer X axis for TILT_*
+# (accel_plan()). Between moves and in the menus everything is polled.
+# Inputs the game does not watch cannot end a move anyway: clicks and
+# turns made before a prompt are dropped by clear_input_events().
+# While a button is still held from the last move both pins are watched
+# until it is released (buttons_armed).
+# With FAIL_FAST any other input is a wrong move, so all of them are
+# watched and the accelerometer runs (wake-gated) in every move, about
+# twice the accelerometer reads of the plan above (see FAIL_FAST).
+
+# What the "inputs" task runs during each move (None: it is off)
+MOVE_INPUTS = {
+    "TURN_CW": poll_encoder,
+    "TURN_CCW": poll_encoder,
+    "PUSH_BTN": poll_button,
+    "PUSH_ENC": poll_encoder_button,
+    "TILT_LEFT": None,
+    "TILT_RIGHT": None,
+}
+
+def input_plan(expected_move):
+    """Poll only what expected_move needs until input_plan_done()."""
+    if FAIL_FAST or not buttons_armed:
+        poll = poll_inputs
+    else:
+        poll = MOVE_INPUTS[expected_move]
+    if poll is None:
+        inputs_task.enabled = False
+    else:
+        inputs_task.fn = poll
+    accel_plan(expected_move)
 
-def button_clicked():
+def input_plan_done(now_ns):
     """
-    Detect a single 'click' event of the separate push button (D8).
-    We treat a transition from released -> pressed as one click.
+    Watch every input again. The pins and encoder were not sampled for
+    a while: take their current state as the starting point, so a press
+    or turn made meanwhile does not show up as a new click or turn.
+    Changed pins are recorded at now_ns (the DONE sync point).
     """
-    global last_button_state
-    current = button.value
-    clicked = False
-    # released (True) -> pressed (False)
-    if last_button_state and (not current):
-        clicked = True
-    last_button_state = current
-    return clicked
+    global last_enc_sw, enc_sw_changed_ns, last_button_state, button_changed_ns
+    poll = inputs_task.fn if inputs_task.enabled else None
+    if poll is not poll_inputs:
+        if poll is not poll_encoder:
+            encoder.sync_position(hw.encoder_position())
+        if poll is not poll_encoder_button:
+            current = hw.encoder_switch()
+            if current != last_enc_sw:
+                recorder.add_at(now_ns, replay.ENC_SW, current)
+                last_enc_sw = current
+                enc_sw_changed_ns = now_ns
+        if poll is not poll_button:
+            current = hw.button_value()
+            if current != last_button_state:
+                recorder.add_at(now_ns, replay.BUTTON, current)
+                last_button_state = current
+                button_changed_ns = now_ns
+    inputs_task.fn = poll_inputs
+    inputs_task.enabled = True
+    accel_plan_done()
 
-def button_pressed():
-    """Return True while the separate push button (D8) is pressed."""
-    return not button.value
+# =========================
+#  Session recording
+# =========================
+#
+# Set RECORD = True (or inject it, like hw) to keep each game's seed,
+# sequences and raw inputs in a RAM ring (replay.py) and save it to
+# RECORD_PATH after the game. code.py can only write the flash if a
+# boot.py remounts it:
+#   import storage
+#   storage.remount("/", readonly=False)
+# USB then sees CIRCUITPY read-only; remove boot.py from the REPL
+# (os.remove("/boot.py")) to edit files again. Copy the file to the host
+# and run
+#   python3 simulator.py --replay last_game.rec
+# or set REPLAY to its path here to play it again on the device.
+# A replay always records, to compare the replayed game with the file.
+if "RECORD" not in globals():
+    RECORD = False
+if REPLAY is not None:
+    RECORD = True
+RECORD_BYTES = 24 * 1024   # about 2200 records; a 10-level game needs 800-1900
+                           # (up to 3800 with FAIL_FAST)
+RECORD_PATH = "/last_game.rec"
+recorder = replay.Recorder(hw.monotonic_ns, ACCEL_SCALE,
+                           RECORD_BYTES if RECORD else replay.RECORD_SIZE)
+recorder.enabled = RECORD
+
+def start_session():
+    """Seed this game's sequences and start its recording (or its replay)."""
+    if REPLAY is not None:
+        seed = hw.rewind()   # recorded seed; recorded inputs from now on
+    else:
+        seed = random.getrandbits(30)
+    random.seed(seed)
+    recorder.start(seed)
+
+def sync_point(kind, a=0, b=0):
+    """Record a point the replay lines up on (replay.SYNC_KINDS). Returns its time (ns)."""
+    now_ns = hw.monotonic_ns()
+    recorder.add_at(now_ns, kind, a, b)
+    if REPLAY is not None:
+        hw.sync(kind)
+    return now_ns
+
+def save_session():
+    """Write the last game to RECORD_PATH, if the flash lets us."""
+    if not RECORD or REPLAY is not None:
+        return
+    try:
+        recorder.save(RECORD_PATH)
+    except OSError:
+        print("recording not saved: flash is read-only (see boot.py above)")
+        return
+    print(recorder.report() + " -> " + RECORD_PATH)
 
 # =========================
-#  Accelerometer calibration / filtering
+#  Scheduler: inputs, LED and display each run as a task
 # =========================
 
-alpha = 0.2  # low-pass filter factor
-fx, fy, fz = accel.acceleration  # initial read
-
-accel_baseline = [0.0, 0.0, 0.0]
-accel_filtered = [fx, fy, fz]
-
-def calibrate_accel(samples=30):
-    """Take samples and compute baseline for x, y, z when the device is held still."""
-    global accel_baseline, accel_filtered
-    sx = sy = sz = 0.0
-    for _ in range(samples):
-        x, y, z = accel.acceleration
-        sx += x
-        sy += y
-        sz += z
-        time.sleep(0.02)
-    baseline_x = sx / samples
-    baseline_y = sy / samples
-    baseline_z = sz / samples
-    accel_baseline = [baseline_x, baseline_y, baseline_z]
-    accel_filtered[:] = accel_baseline[:]  # initialize filter with baseline
+def pump_bus(now):
+    """Scheduler task: send queued OLED pages while no accel read is due."""
+    hw.bus.pump()
 
-def read_filtered_accel():
-    """Read acceleration and apply a simple low-pass filter."""
-    global accel_filtered
-    x, y, z = accel.acceleration
-    fx = alpha * x + (1 - alpha) * accel_filtered[0]
-    fy = alpha * y + (1 - alpha) * accel_filtered[1]
-    fz = alpha * z + (1 - alpha) * accel_filtered[2]
-    accel_filtered = [fx, fy, fz]
-    return accel_filtered
+ACCEL_PERIOD = 0.01    # 100 Hz, same pace as the old wait_for_move loop
+LED_PERIOD = 0.005
+DISPLAY_PERIOD = 0.02
+
+scheduler = Scheduler(clock=hw.monotonic, idle=hw.idle)
+inputs_task = scheduler.add("inputs", 0, poll_inputs)
+accel_task = scheduler.add("accel", ACCEL_PERIOD, sample_accel)
+scheduler.add("led", LED_PERIOD, update_led)
+scheduler.add("display", DISPLAY_PERIOD, update_display)
+scheduler.add("bus", 0, pump_bus)
+hw.bus.watch(accel_task)   # accel reads go before display pages
+
+# =========================
+#  Staged startup
+# =========================
+#
+# The OLED is up and showing the splash. The "boot" task starts the
+# accelerometer, encoder, buttons and NeoPixel one per tick while the
+# opening screen runs; inputs and accel are sampled once all are up.
+# boot.report() on serial shows when each step finished.
+
+def start_devices(now):
+    """Scheduler task: start the next device; when all are up, start sampling."""
+    stage = hw.start_next()
+    if stage is not None:
+        boot.mark(stage)
+        return
+    boot_task.enabled = False
+    devices_ready()
+    boot.mark("ready")
+
+def devices_ready():
+    """Take the first readings and switch on the input and accel tasks."""
+    global last_enc_sw, last_button_state
+    last_enc_sw = hw.encoder_switch()
+    last_button_state = hw.button_value()
+    encoder.feed_position(hw.encoder_position())
+    fx, fy, fz = hw.acceleration()  # initial read
+    accel_lpf.reset(fx, fy, fz)
+    set_accel_stream(ACCEL_STREAM)
+    leds.redraw()   # colors set before the NeoPixel was started
+    inputs_task.enabled = True
+    accel_task.enabled = not ACCEL_WAKE
+
+def finish_boot():
+    """Tick until every device is up (returns at once afterwards)."""
+    scheduler.run_until(lambda: not boot_task.enabled)
+
+inputs_task.enabled = False
+accel_task.enabled = False
+boot_task = scheduler.add("boot", 0, start_devices)
+
+# =========================
+#  Reaction-time telemetry
+# =========================
+
+# Timings of the last 64 moves, summarised after each game
+telemetry = MoveTelemetry(64)
+
+def frame_drawn():
+    """Called by the bus when a frame is completely on the OLED."""
+    telemetry.frame_drawn(hw.monotonic_ns())
+
+hw.bus.on_frame.append(frame_drawn)
+
+def show_reaction_stats():
+    """Reaction time summary on the OLED (ms); the full table goes to serial."""
+    print(telemetry.report())
+    react = telemetry.summary("react")
+    if react is None:
+        return
+    draw = telemetry.summary("draw")
+    show_text("REACTION (ms)",
+              "p50 {}  p95 {}".format(react[0] // 1000, react[1] // 1000),
+              "MAX {}  DRAW {}".format(react[2] // 1000, draw[1] // 1000))
+    scheduler.run_for(3.0)
+
+# =========================
+#  Garbage collection
+# =========================
+
+# Collections happen at safe points (intros, menus, lost lives), and not
+# while a move is timed as long as the heap has room for what moves
+# allocate (measured); free heap and GC time per level.
+memory = GcManager(levels=10)
 
 # =========================
 #  Moves & difficulty
 # =========================
 
-MOVES = [
-    "TURN_CW",
-    "TURN_CCW",
-    "PUSH_BTN",
-    "PUSH_ENC",
-    "TILT_LEFT",
-    "TILT_RIGHT",
-]
-
-# Retro-style labels for each move
-MOVE_LABELS = {
-    "TURN_CW":    "TURN RIGHT >>",
-    "TURN_CCW":   "<< TURN LEFT",
-    "PUSH_BTN":   "PUSH BUTTON",
-    "PUSH_ENC":   "PRESS KNOB",
-    "TILT_LEFT":  "TILT LEFT <",
-    "TILT_RIGHT": "TILT RIGHT >",
-}
+# The moves, indexed by their event kind (events.py)
+MOVES = events.NAMES
 
 DIFFICULTIES = ["EASY", "MED", "HARD"]
 DIFF_TIMES = {   # base time limit per move
@@ -295,33 +785,62 @@ def difficulty_label(diff):
 MAX_LIVES = 3
 lives = MAX_LIVES  # will be reset at the start of each game
 
+LEVEL_SPEEDUP = 0.9  # time limit factor per cleared level
+
+# All in-game lines are prebuilt (see hud.py): no string building mid-move
+hud = Hud(MOVE_LABELS, MAX_LIVES)
+
 def hearts_string():
     """
-    Build a lives string based on current lives.
-    Use only ASCII so it always shows on terminalio font.
-    Example: 'LIVES: ***' when lives == 3.
+    Lives string for the current lives, e.g. 'LIVES: ***' when lives == 3.
+    ASCII only so it always shows on terminalio font; prebuilt in hud.
     """
-    return "LIVES: " + ("*" * lives)
+    return hud.lives_lines[lives]
 
+@profiled("show_game_text")
 def show_game_text(l1="", l2=""):
     """
     Show two lines of game text, with current lives on the bottom line.
     Lives are shown at the very bottom of the screen (y = 48).
     """
-    line1.text = l1
-    line2.text = l2
-    line3.text = ""    # clear middle line
-    line_lives.text = hearts_string()
+    # clear middle line
+    display.show(l1, l2, "", hearts_string())
+
+# =========================
+#  Pre-rendered screens
+# =========================
+
+def prerender_screens():
+    """
+    Build the fixed rows once at boot (move prompts, menus, titles, lives)
+    so showing them during a game is a label swap, not a text layout.
+    Rows with level numbers or timers are built when first shown.
+    """
+    for line in hud.move_lines.values():
+        display.prerender(1, line)
+    for diff in DIFFICULTIES:
+        display.prerender(1, "> " + difficulty_label(diff))
+    for title in ("RETRO REACTOR", "SELECT MODE", "YOU WIN!", "GAME OVER"):
+        display.prerender(0, title)
+    for play_label in ("PLAY", "PLAY AGAIN"):
+        display.prerender(1, "> " + play_label)
+        display.prerender(1, "  " + play_label)
+    display.prerender(2, "> EXIT")
+    display.prerender(2, "  EXIT")
+    display.prerender(1, "   90s ARCADE STYLE")
+    display.prerender(2, "   >> START FUN <<")
+    for line in hud.lives_lines:
+        display.prerender(3, line)
 
 # =========================
-#  Difficulty selection (menu using encoder_read_turn)
+#  Difficulty selection (menu on the input events)
 # =========================
 
 def choose_difficulty():
     """
     Use the encoder to select game difficulty.
     Turn to change difficulty, press knob to confirm.
-    Uses encoder_read_turn() so it shares the same stable encoder logic as the game.
+    Reads the same input events (input_events) as the game.
     """
     options = DIFFICULTIES
     current_index = 0  # 0=EASY, 1=MED, 2=HARD
@@ -330,11 +849,14 @@ def choose_difficulty():
               "> " + difficulty_label(options[current_index]),
               "")
     set_color(0, 0, 50)
+    clear_input_events()
+    memory.collect()   # waiting for the player anyway
 
     while True:
-        # Read encoder rotation using state-machine
-        turn = encoder_read_turn()
-        if turn == "CW":
+        kind = input_events.pop()
+        if kind == events.NONE:
+            scheduler.tick()
+        elif kind == events.TURN_CW:
             if current_index < len(options) - 1:
                 current_index += 1
                 show_text(
@@ -342,7 +864,7 @@ def choose_difficulty():
                     "> " + difficulty_label(options[current_index]),
                     ""
                 )
-        elif turn == "CCW":
+        elif kind == events.TURN_CCW:
             if current_index > 0:
                 current_index -= 1
                 show_text(
@@ -350,82 +872,99 @@ def choose_difficulty():
                     "> " + difficulty_label(options[current_index]),
                     ""
                 )
-
-        # Encoder button click to confirm
-        if encoder_clicked():
+        elif kind == events.PUSH_ENC:
+            # Encoder button click to confirm
             flash_color(0, 255, 0, 0.2)
             return options[current_index]
 
-        time.sleep(0.005)
-
 # =========================
 #  Wait for a specific move
 # =========================
 
+move_check_timer = profiler.timer("move_check")
+
+# With FAIL_FAST a different move than the one asked for ends the round
+# at once (lost life) instead of waiting for the time limit. Inputs in
+# the first REACTION_MIN seconds after the prompt are never wrong: nobody
+# reacts that fast, so they are the previous move still going on (a tilt
+# not yet released). The right move counts at any time, as before.
+# Off by default: it has to watch every input in every move (see
+# input_plan()), which about doubles the accelerometer reads (simulator,
+# 10 games: 103 instead of 45 per second, I2C 2.1% instead of 1.2% busy).
+FAIL_FAST = False
+REACTION_MIN = 0.1
+
+move_event = events.NONE   # the event that ended the last move
+
+def next_move_event(expected, wrong_from_ns):
+    """
+    Pop input events until one decides the move: `expected`, or (with
+    FAIL_FAST) any other move made at or after wrong_from_ns.
+    Returns its kind, or events.NONE when nothing decided it yet.
+    """
+    kind = input_events.pop()
+    while kind != events.NONE:
+        if kind == expected:
+            return kind
+        if FAIL_FAST and input_events.time_ns >= wrong_from_ns:
+            return kind
+        kind = input_events.pop()
+    return kind
+
 def wait_for_move(expected_move, time_limit):
     """
     Wait for the player to perform the expected move within time_limit seconds.
-    Uses:
-      - encoder_read_turn() for TURN_CW / TURN_CCW
-      - encoder_clicked() for PUSH_ENC
-      - button_clicked() for PUSH_BTN (edge-based click)
-      - filtered accelerometer for TILT_LEFT / TILT_RIGHT
-    Returns True if done in time, False otherwise.
+    The poll tasks turn every input into an event (input_events):
+      - full encoder turns for TURN_CW / TURN_CCW
+      - encoder button / push button presses for PUSH_ENC / PUSH_BTN
+      - filtered X crossing TILT_TH for TILT_LEFT / TILT_RIGHT
+    Returns True if done in time, False on a timeout or a wrong move.
     """
-    start_time = time.monotonic()
-
+    global move_event
     set_color(80, 80, 0)  # yellow: waiting
 
-    # Tilt detection based on X axis:
-    # left tilt  = X becomes larger than baseline
-    # right tilt = X becomes smaller than baseline
-    TILT_TH = 2.0  # threshold, can be tuned by feel
-
-    # Reset encoder turn accumulation before waiting
-    encoder_reset_turns()
-
-    while time.monotonic() - start_time < time_limit:
-        fx, fy, fz = read_filtered_accel()
-
-        # Push button (D8): trigger as soon as it is pressed (level-based)
-        if expected_move == "PUSH_BTN" and button_pressed():
-            flash_color(0, 255, 0)
-            # Wait for release so it does not auto-trigger the next move
-            while button_pressed():
-                time.sleep(0.01)
-            return True
-
-
-        # Encoder button click (press the knob)
-        if expected_move == "PUSH_ENC" and encoder_clicked():
-            flash_color(0, 255, 0)
-            return True
-
-        # Rotation moves via state-machine
-        turn_dir = encoder_read_turn()
-        if expected_move == "TURN_CW" and turn_dir == "CW":
-            flash_color(0, 255, 0)
-            return True
-        if expected_move == "TURN_CCW" and turn_dir == "CCW":
-            flash_color(0, 255, 0)
-            return True
-
-        # Tilt moves based on X axis
-        dx = fx - accel_baseline[0]
-
-        # Left tilt: X increases enough
-        if expected_move == "TILT_LEFT" and dx > TILT_TH:
-            flash_color(0, 255, 0)
-            return True
-
-        # Right tilt: X decreases enough
-        if expected_move == "TILT_RIGHT" and dx < -TILT_TH:
-            flash_color(0, 255, 0)
-            return True
-
-        time.sleep(0.01)
+    # Forget clicks/turns made before this move was shown
+    clear_input_events()
+    input_plan(expected_move)
+    expected = MOVES.index(expected_move)   # its event kind
+    sync_point(replay.PROMPT, expected, int(round(accel_baseline[0] / ACCEL_SCALE)))
+    move_event = events.NONE
+
+    # The reaction clock starts once the frame with the prompt is out
+    # (frame_drawn); the bus task sends it between accel reads.
+    shown_ns = hw.monotonic_ns()
+    telemetry.move_shown(shown_ns)
+    telemetry.baseline_drift(drift.drift())
+    if not display.refresh() and not hw.bus.pending:
+        frame_drawn()   # already on the OLED
+    wrong_from_ns = shown_ns + int(REACTION_MIN * 1000000000)
+
+    def move_done():
+        global move_event
+        now_ns = hw.monotonic_ns()   # one clock read per check
+        telemetry.loop(now_ns)
+        # Inputs are sampled by the scheduler tasks; here we only look
+        # at the events they queued since the last tick.
+        with move_check_timer:
+            move_event = next_move_event(expected, wrong_from_ns)
+        if move_event == expected:
+            telemetry.move_done(now_ns, input_events.time_ns)
+        return move_event != events.NONE
+
+    memory.move_start(time_limit)   # no GC pause inside the player's time limit
+    ended = scheduler.run_until(move_done, time_limit)
+    memory.move_end()
+    done = move_event == expected
+    # DONE: 1 = done, 0 = timed out, 2 = wrong move
+    input_plan_done(sync_point(replay.DONE, 1 if done else 2 if ended else 0))
+    if done:
+        flash_color(0, 255, 0)
+        return True
 
-    # Overtime = failure
+    if ended:
+        telemetry.move_wrong()
+    else:
+        telemetry.move_missed()   # overtime = failure
     set_color(255, 0, 0)
     return False
 
@@ -441,27 +980,31 @@ def lose_life(level):
     """
     global lives
     lives -= 1
-    flash_color(255, 0, 0, 0.3)  # red flash
+    recorder.add(replay.LIFE, level, lives)
+    set_color(255, 0, 0)
+    leds.blink((255, 0, 0), 0.15, 0.15, 3)  # red blinks, then solid red
 
     if lives > 0:
         show_game_text("OOPS! LIFE -1", "RETRY LEVEL {}".format(level))
-        set_color(255, 0, 0)
-        time.sleep(1.5)
+        memory.collect()
+        scheduler.run_for(1.5)
         return False
     else:
         show_game_text("OUT OF LIVES", "GAME OVER L{}".format(level))
-        set_color(255, 0, 0)
-        time.sleep(2.0)
+        scheduler.run_for(0.9)
+        leds.fade((0, 0, 0), 1.1)  # red dies out
+        scheduler.run_for(1.1)
         return True
 
 def show_game_win():
     """Show a short win screen (actual replay/exit menu is handled outside)."""
     set_color(0, 255, 0)
+    leds.pulse((0, 255, 0), 0.5, 2.0)
     show_game_text("STAGE CLEAR!", "ALL 10 LEVELS")
-    time.sleep(2.0)
+    scheduler.run_for(2.0)
 
 # =========================
-#  Generic menu: PLAY / EXIT (using encoder_read_turn)
+#  Generic menu: PLAY / EXIT (on the input events)
 # =========================
 
 def menu_play_exit(title_top, play_label="PLAY", exit_label="EXIT"):
@@ -487,26 +1030,26 @@ def menu_play_exit(title_top, play_label="PLAY", exit_label="EXIT"):
 
     draw_menu()
     set_color(0, 0, 50)
+    clear_input_events()
+    memory.collect()   # waiting for the player anyway
 
     while True:
-        # Use the same stable encoder rotation logic
-        turn = encoder_read_turn()
-        if turn == "CW":
+        kind = input_events.pop()
+        if kind == events.NONE:
+            scheduler.tick()
+        elif kind == events.TURN_CW:
             if current_index < len(options) - 1:
                 current_index += 1
                 draw_menu()
-        elif turn == "CCW":
+        elif kind == events.TURN_CCW:
             if current_index > 0:
                 current_index -= 1
                 draw_menu()
-
-        # Click to confirm current selection
-        if encoder_clicked():
+        elif kind == events.PUSH_ENC:
+            # Click to confirm current selection
             flash_color(0, 255, 0, 0.2)
             return options[current_index]
 
-        time.sleep(0.005)
-
 # =========================
 #  Game loop
 # =========================
@@ -523,18 +1066,24 @@ def play_game():
     """
     global lives
     lives = MAX_LIVES
+    reset_accel_stats()
+    telemetry.reset()
+    hw.bus.reset()
+    memory.reset()
+    start_session()
 
     difficulty = choose_difficulty()
     base_time = DIFF_TIMES[difficulty]
+    hud.prepare(difficulty, difficulty_label(difficulty), base_time, LEVEL_SPEEDUP)
 
     # From here on, use show_game_text so lives appear on every game page
     show_game_text("GET READY!", "MODE: " + difficulty_label(difficulty))
     set_color(0, 0, 80)
-    time.sleep(1.5)
+    scheduler.run_for(1.5)
 
     show_game_text("HOLD STILL", "CALIBRATING...")
     calibrate_accel()
-    time.sleep(0.5)
+    scheduler.run_for(0.5)
 
     time_limit = base_time
     level = 1
@@ -542,24 +1091,25 @@ def play_game():
     while level <= 10 and lives > 0:
         sequence_len = level
         sequence = [random.choice(MOVES) for _ in range(sequence_len)]
+        for index in range(sequence_len):
+            recorder.add(replay.MOVE, level, index, MOVES.index(sequence[index]))
 
-        show_game_text(
-            "LEVEL {}  {}".format(level, difficulty_label(difficulty)),
-            "{:d} MOVES, {:.1f}s".format(sequence_len, time_limit)
-        )
+        title, info = hud.intros[level]   # "LEVEL 3  EASY", "3 MOVES, 2.4s"
+        show_game_text(title, info)
         set_color(0, 0, 80)
-        time.sleep(1.5)
+        memory.start_level(level)
+        scheduler.run_for(1.5 - REST_WINDOW)
+        rest_plan()
+        scheduler.run_for(REST_WINDOW)
+        accel_plan_done()
 
         level_cleared = True
 
-        for index, move in enumerate(sequence):
-            label_text = MOVE_LABELS[move]
-            show_game_text(
-                "L{} {}/{} {}".format(
-                    level, index + 1, sequence_len, difficulty_label(difficulty)
-                ),
-                "DO: " + label_text
-            )
+        progress = hud.progress[level]
+        for index in range(sequence_len):   # (enumerate would allocate a tuple per move)
+            move = sequence[index]
+            # "L3 2/3 EASY" / "DO: TURN RIGHT >>", both prebuilt
+            show_game_text(progress[index], hud.move_lines[move])
 
             success = wait_for_move(move, time_limit)
             if not success:
@@ -576,7 +1126,7 @@ def play_game():
         if level_cleared:
             flash_color(0, 200, 0, 0.3)
             level += 1
-            time_limit *= 0.9  # slightly harder each level
+            time_limit *= LEVEL_SPEEDUP  # slightly harder each level
 
     if lives > 0:
         # Player cleared all levels with at least 1 life left
@@ -595,51 +1145,96 @@ def opening_screen():
     '>> START FUN <<' is roughly centered by using leading spaces.
     (Opening screen does not show lives.)
     """
-    start = time.monotonic()
-    while time.monotonic() - start < 5.0:
+    start = hw.monotonic()
+    while hw.monotonic() - start < 5.0:
         # First frame: show text (center-ish)
         show_text("RETRO REACTOR",
                   "   90s ARCADE STYLE",
                   "   >> START FUN <<")
         set_color(0, 0, 80)
-        time.sleep(0.7)
+        scheduler.run_for(0.7)
 
         # Second frame: hide bottom line
         show_text("RETRO REACTOR",
                   "   90s ARCADE STYLE",
                   "")
         set_color(0, 0, 20)
-        time.sleep(0.3)
+        scheduler.run_for(0.3)
 
 # =========================
 #  Main loop with opening + menus
 # =========================
 
-set_color(0, 0, 50)
-
-while True:
-    # Always show opening screen first
-    opening_screen()
+def replay_game():
+    """Play the REPLAY recording once and check it ends the same way."""
+    if hw.recording.dropped:
+        print("replay: the recording lost its start (ring full), cannot replay it")
+        return False
+    finish_boot()
+    set_accel_stream(hw.recording.stream)   # as recorded
+    prerender_screens()
+    result = play_game()
+    recorder.add(replay.END, int(result))
+    print(display.report())
+    print(hw.bus.report())
+    print(telemetry.report())
+    print(recorder.report())
+    diff = replay.compare(hw.records, recorder.records())
+    print("replay: " + ("same game as recorded" if diff is None else diff))
+    return diff is None
+
+def main():
+    """Opening screen, then the PLAY / EXIT menu and games, forever."""
+    if REPLAY is not None:
+        replay_game()
+        return
+    set_color(0, 0, 50)
+    prerender_screens()
+    boot_reported = False
 
-    # Then enter menu / game loop
     while True:
-        # Pre-game menu: choose to PLAY or EXIT
-        choice = menu_play_exit("RETRO REACTOR", play_label="PLAY", exit_label="EXIT")
-        if choice == "EXIT":
-            # Back to opening screen
-            break
-        else:
-            # Start one game run
-            result = play_game()  # True = win, False = lose
-
-            # Post-game menu: PLAY AGAIN or EXIT
-            if result:
-                title = "YOU WIN!"
-            else:
-                title = "GAME OVER"
-
-            choice_after = menu_play_exit(title, play_label="PLAY AGAIN", exit_label="EXIT")
-            if choice_after == "EXIT":
+        # Always show opening screen first
+        opening_screen()
+        if not boot_reported:
+            print(boot.report())   # over serial: time to first frame, each device
+            boot_reported = True
+
+        # Then enter menu / game loop
+        while True:
+            # Pre-game menu: choose to PLAY or EXIT
+            choice = menu_play_exit("RETRO REACTOR", play_label="PLAY", exit_label="EXIT")
+            if choice == "EXIT":
                 # Back to opening screen
                 break
-            # else: loop back to pre-game menu
\ No newline at end of file
+            else:
+                # Start one game run
+                result = play_game()  # True = win, False = lose
+                recorder.add(replay.END, int(result))
+                save_session()
+                print_accel_stats()   # over serial
+                print(display.report())
+                print(leds.report())
+                print(hw.bus.report())
+                print(memory.report())
+                print(input_events.report())
+                print(calibrator.report())
+                print(drift.report())
+                show_reaction_stats()
+                if PROFILE:
+                    print(profiler.report())
+                    profiler.reset()
+
+                # Post-game menu: PLAY AGAIN or EXIT
+                if result:
+                    title = "YOU WIN!"
+                else:
+                    title = "GAME OVER"
+
+                choice_after = menu_play_exit(title, play_label="PLAY AGAIN", exit_label="EXIT")
+                if choice_after == "EXIT":
+                    # Back to opening screen
+                    break
+                # else: loop back to pre-game menu
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# =========================
+#  Quadrature decoder (shared by code.py, hardware.py and the test scripts)
+# =========================
+#
+# Encoder states are (a << 1) | b. Clockwise order is 00 -> 01 -> 11 -> 10.
+# QUAD_TABLE[(prev << 2) | curr] is +1 for a CW edge, -1 for a CCW edge and
+# 0 for "no change" or an invalid jump (both pins changed at once).
+
+QUAD_TABLE = (
+    0, 1, -1, 0,     # prev 00
+    -1, 0, 0, 1,     # prev 01
+    1, 0, 0, -1,     # prev 10
+    0, -1, 1, 0,     # prev 11
+)
+
+VELOCITY_ALPHA = 0.3      # smoothing of the velocity estimate
+VELOCITY_TIMEOUT = 0.25   # no edge for this long -> velocity is 0
+
+
+class QuadratureDecoder:
+    """
+    Integer step accumulator for a quadrature encoder.
+
+    Feed it either raw pin states with update() (polled / edge-queue
+    decoding) or an edge counter with feed_position() (rotaryio).
+    position is the signed total of edges; every `steps_per_detent` edges
+    in the same direction queue one "CW"/"CCW" for read_turn().
+    steps_per_detent=None keeps the position only (no turns are queued,
+    for callers that never read them).
+    """
+
+    def __init__(self, steps_per_detent=2, state=0b11):
+        self.steps_per_detent = steps_per_detent
+        self.state = state
+        self.position = 0
+        self.pending = 0          # signed edges of the current partial turn
+        self.turns = []           # full turns not read yet (oldest first)
+        self.invalid = 0          # invalid jumps seen by update()
+        self.velocity = 0.0       # edges per second (smoothed, signed)
+        self._last_counter = None
+        self._last_edge_time = None
+
+    def update(self, state, now=None):
+        """Decode one pin state. Returns the step: +1, -1 or 0."""
+        prev = self.state
+        if state == prev:
+            return 0
+        self.state = state
+        step = QUAD_TABLE[(prev << 2) | state]
+        if step == 0:
+            # Invalid jump / noise: drop the partial turn
+            self.invalid += 1
+            self.pending = 0
+            return 0
+
+        # Single-edge fast path of add()
+        self.position += step
+        spd = self.steps_per_detent
+        if spd:
+            pending = self.pending
+            if pending * step < 0:
+                pending = 0  # reset opposite direction
+            pending += step
+            if pending == spd:
+                pending = 0
+                self.turns.append("CW")
+            elif pending == -spd:
+                pending = 0
+                self.turns.append("CCW")
+            self.pending = pending
+        if now is not None:
+            self._track_velocity(step, now)
+        return step
+
+    def feed_position(self, counter, now=None):
+        """Take an absolute edge counter (e.g. rotaryio position). Returns the delta."""
+        last = self._last_counter
+        self._last_counter = counter
+        if last is None or counter == last:
+            return 0
+        delta = counter - last
+        self.add(delta, now)
+        return delta
+
+    def sync_position(self, counter):
+        """Take `counter` as the current position without counting the edges since the last one."""
+        self._last_counter = counter
+
+    def add(self, delta, now=None):
+        """Accumulate `delta` edges (signed)."""
+        self.position += delta
+        spd = self.steps_per_detent
+        if not spd:
+            if now is not None:
+                self._track_velocity(delta, now)
+            return
+        pending = self.pending
+        if (delta > 0 and pending < 0) or (delta < 0 and pending > 0):
+            pending = 0  # reset opposite direction
+        pending += delta
+        while pending >= spd:
+            pending -= spd
+            self.turns.append("CW")
+        while pending <= -spd:
+            pending += spd
+            self.turns.append("CCW")
+        self.pending = pending
+        if now is not None:
+            self._track_velocity(delta, now)
+
+    def _track_velocity(self, delta, now):
+        last = self._last_edge_time
+        if last is not None and now > last:
+            rate = delta / (now - last)
+            self.velocity += VELOCITY_ALPHA * (rate - self.velocity)
+        self._last_edge_time = now
+
+    def read_turn(self):
+        """Return the oldest full turn ("CW"/"CCW"), or None."""
+        if self.turns:
+            return self.turns.pop(0)
+        return None
+
+    def reset_turns(self):
+        """Forget partial and not-yet-read turns."""
+        self.pending = 0
+        self.turns.clear()
+
+    def velocity_at(self, now):
+        """Smoothed velocity in edges/s, or 0.0 if the knob has stopped."""
+        last = self._last_edge_time
+        if last is None or now - last > VELOCITY_TIMEOUT:
+            return 0.0
+        return self.velocity
@@ -0,0 +1,113 @@
+import time
+import random
+
+from encoder import QuadratureDecoder
+
+# ---------------------------
+# Encoder decode micro-benchmark: edges decoded per second.
+# Runs on the device (copy next to encoder.py and run from the REPL)
+# and on a host:  python3 encoderBench.py
+# ---------------------------
+
+EDGES = 2000
+ROUNDS = 5
+
+# Clockwise state order, (a << 1) | b
+CW_SEQUENCE = (0b00, 0b01, 0b11, 0b10)
+
+# The dict-of-dicts table code.py used before encoder.py, for comparison
+transition_table = {
+    0b00: {0b01: "CW",  0b10: "CCW"},
+    0b01: {0b11: "CW",  0b00: "CCW"},
+    0b11: {0b10: "CW",  0b01: "CCW"},
+    0b10: {0b00: "CW",  0b11: "CCW"},
+}
+STEPS_PER_TURN = 2
+
+
+def make_states(n, seed=1):
+    """Random walk over the quadrature states (mostly clockwise)."""
+    random.seed(seed)
+    states = []
+    phase = 0
+    for _ in range(n):
+        if random.random() < 0.7:
+            phase += 1
+        else:
+            phase -= 1
+        states.append(CW_SEQUENCE[phase % 4])
+    return states
+
+
+last_state = 0
+cw_steps = 0
+ccw_steps = 0
+
+
+def legacy_update(state):
+    """Old encoder_read_turn() logic (without the 1 ms debounce sleep)."""
+    global last_state, cw_steps, ccw_steps
+    if state == last_state:
+        return None
+    dir_map = transition_table.get(last_state, {})
+    direction = dir_map.get(state, None)
+    if direction == "CW":
+        cw_steps += 1
+        ccw_steps = 0
+    elif direction == "CCW":
+        ccw_steps += 1
+        cw_steps = 0
+    else:
+        cw_steps = 0
+        ccw_steps = 0
+    last_state = state
+    if cw_steps >= STEPS_PER_TURN:
+        cw_steps = 0
+        ccw_steps = 0
+        return "CW"
+    if ccw_steps >= STEPS_PER_TURN:
+        cw_steps = 0
+        ccw_steps = 0
+        return "CCW"
+    return None
+
+
+def legacy_decode(states):
+    """One legacy_update() call per edge, like the old polled loop."""
+    global last_state, cw_steps, ccw_steps
+    last_state = states[0]
+    cw_steps = 0
+    ccw_steps = 0
+    turns = 0
+    for state in states:
+        if legacy_update(state) is not None:
+            turns += 1
+    return turns
+
+
+def table_decode(states):
+    """QuadratureDecoder: one flat-table lookup per edge."""
+    decoder = QuadratureDecoder(steps_per_detent=STEPS_PER_TURN, state=states[0])
+    update = decoder.update
+    for state in states:
+        update(state)
+    return len(decoder.turns)
+
+
+def edges_per_second(fn, states):
+    """Best of ROUNDS runs."""
+    best = None
+    for _ in range(ROUNDS):
+        start = time.monotonic_ns()
+        fn(states)
+        elapsed = time.monotonic_ns() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return len(states) * 1000000000 / max(best, 1)
+
+
+states = make_states(EDGES)
+print("Encoder decode benchmark, {} edges, best of {}".format(EDGES, ROUNDS))
+print("turns: legacy={} table={}".format(legacy_decode(states), table_decode(states)))
+print("legacy dict table : {:>10.0f} edges/s".format(edges_per_second(legacy_decode, states)))
+print("QuadratureDecoder : {:>10.0f} edges/s".format(edges_per_second(table_decode, states)))
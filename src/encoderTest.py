@@ -2,6 +2,8 @@ import time
 import board
 import digitalio
 
+from encoder import QuadratureDecoder
+
 # ---------------------------
 # Rotary Encoder Pins
 # ---------------------------
@@ -29,21 +31,10 @@ def read_state():
     # You can swap a/b order if your wiring is reversed
     return (a << 1) | b   # state: 0b00, 0b01, 0b10, 0b11
 
-# Transition table for a standard 2-bit quadrature encoder.
-# Keys: previous_state -> {current_state: "CW"/"CCW"}
-transition_table = {
-    0b00: {0b01: "CW",  0b10: "CCW"},
-    0b01: {0b11: "CW",  0b00: "CCW"},
-    0b11: {0b10: "CW",  0b01: "CCW"},
-    0b10: {0b00: "CW",  0b11: "CCW"},
-}
-
-last_state = read_state()
-
-# Accumulate steps to filter noise
-cw_steps = 0
-ccw_steps = 0
-STEPS_PER_CLICK = 2     # Require 2 valid transitions to print once
+# Shared decoder from encoder.py (the same one code.py uses)
+# Require 2 valid transitions to print once
+STEPS_PER_CLICK = 2
+decoder = QuadratureDecoder(steps_per_detent=STEPS_PER_CLICK, state=read_state())
 
 last_sw = sw.value
 
@@ -55,38 +46,20 @@ while True:
     # ---------------------------
     current_state = read_state()
 
-    if current_state != last_state:
+    if current_state != decoder.state:
         # Tiny delay to help mechanical bounce settle
         time.sleep(0.001)
 
-        # Re-read to confirm stable state
+        # Re-read to confirm stable state, then decode it
         stable_state = read_state()
-
-        if stable_state != last_state:
-            # Look up direction from transition table
-            dir_map = transition_table.get(last_state, {})
-            direction = dir_map.get(stable_state, None)
-
-            if direction == "CW":
-                cw_steps += 1
-                ccw_steps = 0      # reset opposite direction (noise)
-            elif direction == "CCW":
-                ccw_steps += 1
-                cw_steps = 0       # reset opposite direction (noise)
-            else:
-                # Invalid jump (noise), reset both
-                cw_steps = 0
-                ccw_steps = 0
-
-            # When enough consistent steps accumulated, print once
-            if cw_steps >= STEPS_PER_CLICK:
-                print("Rotated: CW (state-machine)")
-                cw_steps = 0
-            if ccw_steps >= STEPS_PER_CLICK:
-                print("Rotated: CCW (state-machine)")
-                ccw_steps = 0
-
-            last_state = stable_state
+        if stable_state != decoder.state:
+            decoder.update(stable_state, time.monotonic())
+
+    # When enough consistent steps accumulated, print once
+    direction = decoder.read_turn()
+    if direction is not None:
+        print("Rotated: {} (state-machine)  pos={} vel={:+.0f} edges/s".format(
+            direction, decoder.position, decoder.velocity_at(time.monotonic())))
 
     # ---------------------------
     # Button click detection
@@ -0,0 +1,74 @@
+# =========================
+#  Input event queue
+# =========================
+#
+# Every input that can end a move becomes one timestamped event: a full
+# encoder turn, a press of either button, or the filtered X axis
+# crossing the tilt threshold. The poll tasks push events as they see
+# them and wait_for_move pops them oldest first, so the right move, a
+# wrong move and the time each was made all come from one place.
+#
+# The queue is a fixed ring (no allocation per event); when it is full
+# the oldest event is dropped.
+
+# Event kinds: the move an event makes, an index into NAMES (code.py's MOVES)
+TURN_CW = 0
+TURN_CCW = 1
+PUSH_BTN = 2
+PUSH_ENC = 3
+TILT_LEFT = 4
+TILT_RIGHT = 5
+NONE = -1      # pop() on an empty queue
+
+NAMES = ("TURN_CW", "TURN_CCW", "PUSH_BTN", "PUSH_ENC", "TILT_LEFT", "TILT_RIGHT")
+
+
+class EventQueue:
+    """The last `size` input events (kind, time in ns), popped oldest first."""
+
+    def __init__(self, size=16):
+        self.kinds = bytearray(size)
+        self.times = [0] * size
+        self.size = size
+        self.head = 0            # oldest event
+        self.count = 0           # events waiting
+        self.time_ns = 0         # time of the event pop() returned last
+        self.totals = [0] * len(NAMES)   # events pushed per kind
+        self.dropped = 0
+
+    def push(self, kind, ns):
+        if self.count == self.size:
+            self.head += 1
+            if self.head == self.size:
+                self.head = 0
+            self.count -= 1
+            self.dropped += 1
+        i = self.head + self.count
+        if i >= self.size:
+            i -= self.size
+        self.kinds[i] = kind
+        self.times[i] = ns
+        self.count += 1
+        self.totals[kind] += 1
+
+    def pop(self):
+        """Kind of the oldest event (its time goes to time_ns), or NONE."""
+        if self.count == 0:
+            return NONE
+        i = self.head
+        self.head += 1
+        if self.head == self.size:
+            self.head = 0
+        self.count -= 1
+        self.time_ns = self.times[i]
+        return self.kinds[i]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def report(self):
+        parts = []
+        for kind in range(len(NAMES)):
+            parts.append("{} {}".format(NAMES[kind].lower(), self.totals[kind]))
+        return "events: " + ", ".join(parts) + " ({} dropped)".format(self.dropped)
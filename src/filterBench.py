@@ -0,0 +1,73 @@
+import array
+import random
+
+from accel import LowPassFilter
+from adxl345 import SCALE
+from bench import measure
+
+# ---------------------------
+# Accelerometer low-pass filter benchmark: time and heap per sample.
+# Runs on the device (copy next to accel.py, adxl345.py and bench.py and run from the REPL)
+# and on a host:  python3 filterBench.py
+# Heap use is only measured where gc.mem_alloc() exists (CircuitPython).
+# ---------------------------
+
+SAMPLES = 960          # 30 full FIFOs
+alpha = 0.2
+
+# Raw counts around 1 g on Z, plus the same samples in m/s^2
+random.seed(1)
+raw = array.array("h", [0] * (3 * SAMPLES))
+for i in range(0, 3 * SAMPLES, 3):
+    raw[i] = random.randint(-60, 60)
+    raw[i + 1] = random.randint(-20, 20)
+    raw[i + 2] = 250 + random.randint(-20, 20)
+ms2 = array.array("f", [v * SCALE for v in raw])
+
+# The read_filtered_accel() body code.py used before accel.py
+accel_filtered = [0.0, 0.0, 9.8]
+
+
+def legacy_filter(x, y, z):
+    global accel_filtered
+    fx = alpha * x + (1 - alpha) * accel_filtered[0]
+    fy = alpha * y + (1 - alpha) * accel_filtered[1]
+    fz = alpha * z + (1 - alpha) * accel_filtered[2]
+    accel_filtered = [fx, fy, fz]
+    return accel_filtered
+
+
+def run_legacy():
+    for i in range(0, 3 * SAMPLES, 3):
+        legacy_filter(ms2[i], ms2[i + 1], ms2[i + 2])
+
+
+float_lpf = LowPassFilter(alpha)
+
+
+def run_float():
+    update = float_lpf.update
+    for i in range(0, 3 * SAMPLES, 3):
+        update(ms2[i], ms2[i + 1], ms2[i + 2])
+
+
+fixed_lpf = LowPassFilter(alpha, fixed=True, scale=SCALE)
+# Same shape as the "accel" task: one batch per drained FIFO
+fifos = [raw[start:start + 3 * 32] for start in range(0, 3 * SAMPLES, 3 * 32)]
+
+
+def run_fixed():
+    update_raw = fixed_lpf.update_raw
+    for fifo in fifos:
+        update_raw(fifo, 32)
+
+
+print("Low-pass filter benchmark, {} samples".format(SAMPLES))
+for name, fn in (("legacy list + float", run_legacy),
+                 ("LowPassFilter float", run_float),
+                 ("LowPassFilter fixed", run_fixed)):
+    us, heap = measure(fn, SAMPLES)
+    if heap is None:
+        print("{:<20} {:>7.2f} us/sample   heap: n/a on this Python".format(name, us))
+    else:
+        print("{:<20} {:>7.2f} us/sample   heap: {:>6.1f} bytes/sample".format(name, us, heap))
@@ -11,6 +11,13 @@ import i2cdisplaybus
 import adafruit_adxl34x
 from neopixel import NeoPixel
 
+from encoder import QuadratureDecoder
+
+try:
+    import rotaryio
+except ImportError:
+    rotaryio = None
+
 # ================================
 # I2C: OLED + ADXL345 share D5/D4
 # ================================
@@ -58,30 +65,49 @@ def set_pixel_color(r, g, b):
 # Rotary Encoder
 # A = D0, B = D6, SW = D7
 # ================================
-clk = digitalio.DigitalInOut(board.D0)   # A
-clk.direction = digitalio.Direction.INPUT
-clk.pull = digitalio.Pull.UP
-
-dt = digitalio.DigitalInOut(board.D6)    # B
-dt.direction = digitalio.Direction.INPUT
-dt.pull = digitalio.Pull.UP
+# encoder_pos counts clk (A) edges, up when dt (B) is at the other level
+# after the edge, as in the first version of this test. That is the
+# opposite sign of encoder.py and rotaryio, hence the minus signs below.
+encoder = None
+if rotaryio is not None:
+    # Hardware counter, every edge is counted in the background;
+    # divisor=2 gives one count per clk edge
+    encoder = rotaryio.IncrementalEncoder(board.D0, board.D6, divisor=2)
+else:
+    clk = digitalio.DigitalInOut(board.D0)   # A
+    clk.direction = digitalio.Direction.INPUT
+    clk.pull = digitalio.Pull.UP
+
+    dt = digitalio.DigitalInOut(board.D6)    # B
+    dt.direction = digitalio.Direction.INPUT
+    dt.pull = digitalio.Pull.UP
 
 enc_sw = digitalio.DigitalInOut(board.D7)  # encoder button
 enc_sw.direction = digitalio.Direction.INPUT
 enc_sw.pull = digitalio.Pull.UP  # 按下时为 False
 
-last_clk = clk.value
+def read_state():
+    """Read encoder AB pins as a 2-bit state: 0..3"""
+    a = 1 if clk.value else 0
+    b = 1 if dt.value else 0
+    return (a << 1) | b
+
+# Without rotaryio the pins are polled on every loop pass (see the main
+# loop), with the shared decoder from encoder.py. Position only: turns
+# are never read here, so none are queued.
+decoder = None
+if encoder is None:
+    decoder = QuadratureDecoder(steps_per_detent=None, state=read_state())
 encoder_pos = 0
 
 def update_encoder():
-    global last_clk, encoder_pos
-    current_clk = clk.value
-    if current_clk != last_clk:
-        if dt.value != current_clk:
-            encoder_pos += 1
-        else:
-            encoder_pos -= 1
-    last_clk = current_clk
+    global encoder_pos
+    if encoder is not None:
+        encoder_pos = -encoder.position
+        return
+    decoder.update(read_state())
+    # two quadrature edges per clk edge
+    encoder_pos = -int(decoder.position / 2)
 
 def encoder_pressed():
     return not enc_sw.value
@@ -99,8 +125,17 @@ def button_pressed():
 # ================================
 # Main loop
 # ================================
+# The encoder is read on every pass; the sensors and the screen only
+# every REFRESH seconds.
+REFRESH = 0.05
+next_refresh = time.monotonic()
+
 while True:
     update_encoder()
+    now = time.monotonic()
+    if now < next_refresh:
+        continue
+    next_refresh = now + REFRESH
 
     # update accelerometer
     x, y, z = accel.acceleration
@@ -124,6 +159,4 @@ while True:
         "ON" if btn else "OFF",
         "ON" if enc_btn else "OFF"
     )
-    line3.text = "Z: {:.2f} m/s^2".format(z)
-
-    time.sleep(0.05)
\ No newline at end of file
+    line3.text = "Z: {:.2f} m/s^2".format(z)
\ No newline at end of file
@@ -0,0 +1,222 @@
+import gc
+import json
+import os
+import random
+import sys
+import time
+
+from simulator import SimBackend, SimPlayer, load_game
+
+# ---------------------------
+# Game loop benchmark suite on the simulated hardware (host only).
+#
+#   python3 gameBench.py           run and compare with gameBench.json
+#   python3 gameBench.py --save    run and store the results as the new baseline
+#
+# Latencies are in virtual time and deterministic. Rates are wall-clock:
+# each round also times a fixed plain-Python loop, and rates are scaled to
+# a machine doing REFERENCE_RATE of those per second, so a busy or slower
+# host does not look like a regression. Exits with status 1 when a metric
+# regressed by more than its tolerance.
+# ---------------------------
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gameBench.json")
+
+SEED = 1
+LOOP_SECONDS = 4.0      # virtual seconds of busy loop for the loop-rate bench
+LATENCY_TRIALS = 20     # per move
+CALLS = 20000           # encoder_read_turn / read_filtered_accel calls
+GAMES = 5
+ROUNDS = 3              # each bench runs ROUNDS times, best value kept
+REFERENCE_RATE = 2e7    # reference loop iterations/s that rates are scaled to
+
+# metric: (higher is better?, allowed relative regression)
+METRICS = {
+    "loop_iterations_per_s":   (True, 0.30),
+    "heap_blocks_per_iter":    (False, 0.50),
+    "detect_p50_ms":           (False, 0.10),
+    "detect_p95_ms":           (False, 0.10),
+    "detect_max_ms":           (False, 0.25),
+    "encoder_read_turn_per_s": (True, 0.30),
+    "filtered_accel_per_s":    (True, 0.30),
+    "sensor_wait_max_ms":      (False, 0.50),
+    "games_per_s":             (True, 0.30),
+    "virtual_speedup":         (True, 0.30),
+}
+
+# Wall-clock metrics, scaled by reference_rate()
+RATES = ("loop_iterations_per_s", "encoder_read_turn_per_s", "filtered_accel_per_s",
+         "games_per_s", "virtual_speedup")
+
+
+def reference_rate(n=200000):
+    """Iterations/s of a fixed plain-Python loop right now (best of 3)."""
+    best = 0.0
+    for _ in range(3):
+        x = 0
+        start = time.perf_counter()
+        for i in range(n):
+            x += i & 7
+        rate = n / (time.perf_counter() - start)
+        if rate > best:
+            best = rate
+    return best
+
+
+def new_game(seed=SEED):
+    random.seed(seed)
+    hw = SimBackend(seed=seed)
+    return hw, load_game(hw)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[(p * len(values) - 1) // 100]
+
+
+def bench_loop():
+    """Busy wait_for_move-style loop with no idle skipping: ticks/s and heap churn."""
+    hw, game = new_game()
+    scheduler = game.scheduler
+    scheduler.idle = None          # every tick really runs, like on the device
+    game.accel_plan("TILT_LEFT")   # worst case: accel sampled too
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    ticks = scheduler.ticks
+    start = time.perf_counter()
+    scheduler.run_until(lambda: False, LOOP_SECONDS)
+    wall = time.perf_counter() - start
+    ticks = scheduler.ticks - ticks
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks
+    return {
+        "loop_iterations_per_s": ticks / wall,
+        "heap_blocks_per_iter": max(blocks, 0) / ticks,
+    }
+
+
+def schedule_move(hw, move, t):
+    """Script the input for `move` at t. Returns when the input is complete."""
+    if move == "TURN_CW" or move == "TURN_CCW":
+        hw.turn(t, 1 if move == "TURN_CW" else -1)
+        return t + 0.002      # second edge
+    if move == "PUSH_BTN":
+        hw.press_button(t)
+    elif move == "PUSH_ENC":
+        hw.press_encoder(t)
+    else:
+        hw.tilt(t, 4.0 if move == "TILT_LEFT" else -4.0)
+    return t
+
+
+def bench_latency():
+    """Input complete -> wait_for_move() returns, over every move type (ms)."""
+    hw, game = new_game()
+    game.calibrate_accel()
+    rng = random.Random(SEED)
+    latencies = []
+    for move in game.MOVES:
+        for _ in range(LATENCY_TRIALS):
+            game.show_game_text("BENCH", "DO: " + game.MOVE_LABELS[move])
+            t_input = schedule_move(hw, move, hw.now + rng.uniform(0.05, 0.3))
+            if not game.wait_for_move(move, 2.0):
+                raise RuntimeError("{} was not detected".format(move))
+            latencies.append((hw.now - t_input) * 1000)
+            game.scheduler.run_for(0.6)   # let the tilt / press end
+    return {
+        "detect_p50_ms": percentile(latencies, 50),
+        "detect_p95_ms": percentile(latencies, 95),
+        "detect_max_ms": max(latencies),
+    }
+
+
+def bench_calls():
+    """Raw call rate of the two per-tick helpers."""
+    hw, game = new_game()
+    read_turn = game.encoder_read_turn
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        read_turn()
+    turn_rate = CALLS / (time.perf_counter() - start)
+    read_accel = game.read_filtered_accel
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        read_accel()
+    return {
+        "encoder_read_turn_per_s": turn_rate,
+        "filtered_accel_per_s": CALLS / (time.perf_counter() - start),
+    }
+
+
+def bench_games():
+    """Full play_game() runs against SimPlayer, plus the worst I2C wait of an accel read."""
+    hw, game = new_game()
+    SimPlayer(hw, game.MOVE_LABELS, accuracy=0.97)
+    start = time.perf_counter()
+    for _ in range(GAMES):
+        game.play_game()
+    wall = time.perf_counter() - start
+    return {
+        "sensor_wait_max_ms": hw.bus.max_wait * 1000,
+        "games_per_s": GAMES / wall,
+        "virtual_speedup": hw.now / wall,
+    }
+
+
+def compare(results, baseline):
+    """Print every metric against the baseline. Returns the regressed names."""
+    failed = []
+    for name, (higher, tolerance) in METRICS.items():
+        value = results[name]
+        base = baseline.get(name)
+        if base is None:
+            print("{:<24} {:>12.3f}   (no baseline)".format(name, value))
+            continue
+        if base == 0:
+            change = value    # nothing to scale by: compare absolutely
+        else:
+            change = (value - base) / base
+        worse = -change if higher else change
+        status = "ok"
+        if worse > tolerance:
+            status = "REGRESSED"
+            failed.append(name)
+        print("{:<24} {:>12.3f}   baseline {:>12.3f}   {:>+7.1%}  {}".format(
+            name, value, base, change, status))
+    return failed
+
+
+def main():
+    results = {}
+    for bench in (bench_loop, bench_latency, bench_calls, bench_games):
+        for _ in range(ROUNDS):
+            scale = REFERENCE_RATE / reference_rate()
+            for name, value in bench().items():
+                if name in RATES:
+                    value *= scale
+                best = results.get(name)
+                higher = METRICS[name][0]
+                if best is None or (value > best if higher else value < best):
+                    results[name] = value
+
+    if "--save" in sys.argv:
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        for name in METRICS:
+            print("{:<24} {:>12.3f}".format(name, results[name]))
+        print("baseline saved to {}".format(BASELINE))
+        return 0
+
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+    failed = compare(results, baseline)
+    if failed:
+        print("regressions: " + ", ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+import time
+import board
+import busio
+import digitalio
+import displayio
+import microcontroller
+import terminalio
+
+# adafruit_adxl34x and neopixel are imported in the _start_*() method of
+# their device below, and the displayio label/driver libraries only when
+# DISPLAY_PAGES is False, because loading them is a good part of the boot
+# time and the first frame needs none of them.
+
+from i2cbus import BUS_FREQUENCY, BusArbiter
+from adxl345 import SCALE as ACCEL_SCALE
+from screen import FRAME_BYTES, PAGE_OVERHEAD, DirtyPages, LruCache, cache_capacity
+
+try:
+    import rotaryio
+except ImportError:
+    rotaryio = None
+
+# ADXL345 INT1 -> GPIO, if wired (e.g. board.D9). With None the activity
+# interrupt is polled through the INT_SOURCE register instead.
+ACCEL_INT_PIN = None
+
+# Where the last steady accelerometer baseline is kept in microcontroller.nvm
+NVM_BASELINE = 0
+
+# True: drive the OLED ourselves (ssd1306.py) so frames go out page by page
+# between sensor reads. False: displayio labels, one frame per refresh.
+DISPLAY_PAGES = True
+
+# True: only the OLED is started in HardwareBackend(); start_next() brings
+# up the other devices one at a time after the first frame is out.
+# False: everything is started up front (to compare boot times).
+STAGED_BOOT = True
+
+# =========================
+#  Real CircuitPython backend
+# =========================
+#
+# code.py only talks to the hardware through the methods below.
+# simulator.SimBackend has the same methods, so the game can also run
+# on a Linux box.
+
+
+def _input_pin(pin):
+    """Digital input with pull-up (pressed / low -> False)."""
+    io = digitalio.DigitalInOut(pin)
+    io.direction = digitalio.Direction.INPUT
+    io.pull = digitalio.Pull.UP
+    return io
+
+
+class HardwareBackend:
+    """OLED + ADXL345 on I2C D5/D4, encoder A=D0 B=D6 SW=D7, button D8, NeoPixel D1."""
+
+    def __init__(self):
+        # --- Display (OLED 128x64, I2C D5/D4) ---
+        displayio.release_displays()
+        self.i2c = busio.I2C(board.D5, board.D4, frequency=BUS_FREQUENCY)  # SCL=D5, SDA=D4
+        self.bus = BusArbiter(time.monotonic)
+
+        # Four text rows, 16 px apart; the last one shows LIVES during a game.
+        # The page driver draws the changed characters of a row straight
+        # into its framebuffer; for displayio every (row, text) is laid out
+        # once as a label and kept in row_cache.
+        self.row_cache = None
+        if DISPLAY_PAGES:
+            from ssd1306 import Ssd1306
+            self.oled = Ssd1306(self.i2c, terminalio.FONT)
+            self.dirty = DirtyPages()
+            self.bus.send = self._send_page
+            for row in range(4):
+                self.set_line(row, "")
+        else:
+            import i2cdisplaybus
+            import adafruit_displayio_ssd1306
+            from adafruit_display_text import label
+            self.label_class = label.Label
+            self.row_cache = LruCache(cache_capacity())
+            display_bus = i2cdisplaybus.I2CDisplayBus(self.i2c, device_address=0x3C)
+            self.display = adafruit_displayio_ssd1306.SSD1306(display_bus, width=128, height=64)
+            # Refreshes are driven by code.py's "display" task
+            self.display.auto_refresh = False
+            self.main_group = displayio.Group()
+            for row in range(4):
+                self.main_group.append(self._row_label(row, ""))
+            self.display.root_group = self.main_group
+
+        # Not started yet: see start_next()
+        self.accel = None
+        self.accel_fifo = None     # adxl345.Adxl345Fifo, made on first use
+        self.accel_act = None      # adxl345.Adxl345Activity, made on first use
+        self.accel_axis = None     # adxl345.Adxl345Axis, made on first use
+        # Polled-mode counters (the FIFO reader keeps its own)
+        self.accel_samples = 0
+        self.poll_reads = 0
+        self.encoder = None
+        self.enc_edges = None
+        self.enc_sw = None
+        self.button = None
+        self.pixel = None
+        self.stages = [("accel", self._start_accel),
+                       ("encoder", self._start_encoder),
+                       ("buttons", self._start_buttons),
+                       ("pixel", self._start_pixel)]
+        if not STAGED_BOOT:
+            while self.start_next() is not None:
+                pass
+
+    # --- staged startup ---
+
+    def start_next(self):
+        """Start the next device that is not up yet. Returns its name, None when all are up."""
+        if not self.stages:
+            return None
+        name, start = self.stages.pop(0)
+        start()
+        return name
+
+    def _start_accel(self):
+        # --- Accelerometer ADXL345 (same I2C on D5/D4) ---
+        import adafruit_adxl34x
+        self.accel = adafruit_adxl34x.ADXL345(self.i2c)
+
+    def _start_encoder(self):
+        # --- Rotary Encoder: A=D0, B=D6, SW=D7 ---
+        # Position is counted in the background, independent of the game
+        # loop. You can swap the A/B pins if your wiring is reversed.
+        if rotaryio is not None:
+            # Hardware counter; divisor=1 counts every quadrature edge
+            self.encoder = rotaryio.IncrementalEncoder(board.D0, board.D6, divisor=1)
+        else:
+            # keypad scans A/B in the background and queues every change
+            import keypad
+            self.enc_edges = keypad.Keys((board.D0, board.D6), value_when_pressed=False,
+                                         pull=True, interval=0.001)
+            self.enc_event = keypad.Event()
+            # Both pins high (pull-ups) at rest; position only, code.py
+            # makes the turns from encoder_position()
+            from encoder import QuadratureDecoder
+            self.enc_decoder = QuadratureDecoder(steps_per_detent=None, state=0b11)
+        self.enc_sw = _input_pin(board.D7)
+
+    def _start_buttons(self):
+        # --- Push Button: D8 ---
+        self.button = _input_pin(board.D8)
+
+    def _start_pixel(self):
+        # --- NeoPixel: D1, 1 LED ---
+        from neopixel import NeoPixel
+        self.pixel = NeoPixel(board.D1, 1, auto_write=True)
+        self.pixel.brightness = 0.3
+
+    # --- clock ---
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def monotonic_ns(self):
+        return time.monotonic_ns()
+
+    # No idle hook on the device: the scheduler simply keeps polling
+    idle = None
+
+    # --- inputs ---
+
+    def encoder_position(self):
+        """Signed count of quadrature edges since start (CW = up)."""
+        if self.encoder is not None:
+            return self.encoder.position
+
+        # Drain the edge queue: key 0 is A, key 1 is B; pressed = pin low
+        event = self.enc_event
+        decoder = self.enc_decoder
+        while self.enc_edges.events.get_into(event):
+            bit = 0b10 if event.key_number == 0 else 0b01
+            if event.pressed:
+                decoder.update(decoder.state & ~bit)
+            else:
+                decoder.update(decoder.state | bit)
+        return decoder.position
+
+    def encoder_switch(self):
+        """Encoder button pin: True = released, False = pressed."""
+        return self.enc_sw.value
+
+    def button_value(self):
+        """Push button pin: True = released, False = pressed."""
+        return self.button.value
+
+    def acceleration(self):
+        """(x, y, z) in m/s^2."""
+        self.accel_samples += 1
+        self.poll_reads += 1
+        start = time.monotonic()
+        xyz = self.accel.acceleration
+        self.bus.hold(start, time.monotonic(), sensor=True)
+        return xyz
+
+    def acceleration_x(self):
+        """X only in m/s^2 (2 data bytes instead of 6; not in stream mode)."""
+        if self.accel_axis is None:
+            from adxl345 import Adxl345Axis
+            self.accel_axis = Adxl345Axis(self.i2c)
+        self.accel_samples += 1
+        start = time.monotonic()
+        x = self.accel_axis.read_x() * ACCEL_SCALE
+        self.bus.hold(start, time.monotonic(), sensor=True)
+        return x
+
+    def accel_stream(self, enable, rate=100):
+        """Switch the ADXL345 FIFO between stream mode and bypass."""
+        if enable:
+            if self.accel_fifo is None:
+                from adxl345 import Adxl345Fifo
+                self.accel_fifo = Adxl345Fifo(self.i2c, rate)
+            else:
+                self.accel_fifo.start(rate)
+        elif self.accel_fifo is not None:
+            self.accel_fifo.stop()
+
+    def accel_fifo_clear(self):
+        """Drop the samples buffered in stream mode."""
+        self.accel_fifo.clear()
+
+    def accel_fifo_into(self, out):
+        """Drain buffered samples as raw counts into `out`. Returns the count."""
+        start = time.monotonic()
+        n = self.accel_fifo.read_into(out)
+        self.bus.hold(start, time.monotonic(), sensor=True)
+        self.accel_samples += n
+        return n
+
+    def accel_activity_arm(self, threshold):
+        """Let the ADXL345 signal when |x| passes `threshold` m/s^2."""
+        if self.accel_act is None:
+            from adxl345 import Adxl345Activity
+            int_pin = None
+            if ACCEL_INT_PIN is not None:
+                int_pin = digitalio.DigitalInOut(ACCEL_INT_PIN)
+                int_pin.direction = digitalio.Direction.INPUT
+            self.accel_act = Adxl345Activity(self.i2c, int_pin)
+        self.accel_act.arm(threshold)
+
+    def accel_activity_disarm(self):
+        if self.accel_act is not None:
+            self.accel_act.disarm()
+
+    def accel_activity(self):
+        """True once the armed activity interrupt fired."""
+        return self.accel_act.triggered()
+
+    def accel_bus_stats(self):
+        """(samples, I2C reads, bus sessions) for the accelerometer so far."""
+        reads = self.poll_reads
+        sessions = self.poll_reads
+        for regs in (self.accel_fifo, self.accel_act, self.accel_axis):
+            if regs is not None:
+                reads += regs.reads
+                sessions += regs.sessions
+        return self.accel_samples, reads, sessions
+
+    # --- saved calibration ---
+
+    def load_baseline(self):
+        """Baseline (raw counts) saved by an earlier calibration, or None."""
+        import calibration
+        nvm = getattr(microcontroller, "nvm", None)
+        if nvm is None:
+            return None
+        return calibration.unpack(nvm[NVM_BASELINE:NVM_BASELINE + calibration.CACHE_SIZE])
+
+    def save_baseline(self, counts):
+        import calibration
+        nvm = getattr(microcontroller, "nvm", None)
+        if nvm is not None:
+            nvm[NVM_BASELINE:NVM_BASELINE + calibration.CACHE_SIZE] = calibration.pack(counts)
+
+    # --- outputs ---
+
+    def set_pixel(self, color):
+        if self.pixel is not None:   # the "pixel" stage may not have run yet
+            self.pixel[0] = color
+
+    def _new_label(self, row, text):
+        return self.label_class(terminalio.FONT, text=text, anchor_point=(0, 0),
+                           anchored_position=(0, 16 * row))
+
+    def _row_label(self, row, text):
+        """Cached label for `text` on `row`, laid out on a miss."""
+        line = self.row_cache.get((row, text))
+        if line is None:
+            line = self._new_label(row, text)
+            self.row_cache.put((row, text), line)
+        return line
+
+    def prerender(self, row, text):
+        """Lay out a fixed row now and keep it for good (page driver: its glyphs)."""
+        if DISPLAY_PAGES:
+            self.oled.prepare(text)
+        elif (row, text) not in self.row_cache.items:
+            self.row_cache.put((row, text), self._new_label(row, text), pin=True)
+
+    def _send_page(self, page):
+        lo, hi = self.dirty.take(page)
+        return self.oled.send_page(page, lo, hi)
+
+    def set_line(self, index, text):
+        if DISPLAY_PAGES:
+            lo, hi = self.dirty.mark_row(index, text)
+            self.oled.draw_row(index, text, lo, hi)
+        else:
+            self.main_group[index] = self._row_label(index, text)
+
+    def refresh(self):
+        """
+        Push the rows to the OLED. Returns the I2C bytes sent (estimate).
+        With the page driver this only queues the dirty pages; the "bus"
+        task sends them between sensor reads.
+        """
+        if DISPLAY_PAGES:
+            pages = self.dirty.pages()
+            self.bus.start_frame(pages)
+            return self.dirty.bytes_for(pages, PAGE_OVERHEAD)
+        self.bus.transfer(self.display.refresh)
+        return FRAME_BYTES
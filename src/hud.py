@@ -0,0 +1,55 @@
+# =========================
+#  HUD text tables
+# =========================
+#
+# Every line the game shows during play is built before the game starts,
+# so showing a move, the progress counter or the lives line is a table
+# lookup and allocates nothing while the player is being timed.
+
+LEVELS = 10
+
+# Retro-style labels for each move (code.py and the benchmarks)
+MOVE_LABELS = {
+    "TURN_CW":    "TURN RIGHT >>",
+    "TURN_CCW":   "<< TURN LEFT",
+    "PUSH_BTN":   "PUSH BUTTON",
+    "PUSH_ENC":   "PRESS KNOB",
+    "TILT_LEFT":  "TILT LEFT <",
+    "TILT_RIGHT": "TILT RIGHT >",
+}
+
+
+class Hud:
+    """Prebuilt game lines: lives, move prompts, and per-level lines for one difficulty."""
+
+    def __init__(self, move_labels, max_lives, levels=LEVELS):
+        self.levels = levels
+        # lives_lines[n] = "LIVES: " + n stars (ASCII so terminalio shows it)
+        self.lives_lines = tuple("LIVES: " + "*" * n for n in range(max_lives + 1))
+        self.move_lines = {}
+        for move, label_text in move_labels.items():
+            self.move_lines[move] = "DO: " + label_text
+        self.difficulty = None
+        self.progress = ()   # progress[level][index] = "L3 2/3 EASY"
+        self.intros = ()     # intros[level] = ("LEVEL 3  EASY", "3 MOVES, 2.4s")
+
+    def prepare(self, difficulty, name, base_time, speedup):
+        """
+        Build the per-level lines for `difficulty` (shown as `name`).
+        Time limits follow the game: base_time, times `speedup` per level.
+        Call it outside the move windows, e.g. right after the mode is chosen.
+        """
+        if difficulty == self.difficulty:
+            return
+        progress = [()]
+        intros = [()]
+        time_limit = base_time
+        for level in range(1, self.levels + 1):
+            progress.append(tuple("L{} {}/{} {}".format(level, i, level, name)
+                                  for i in range(1, level + 1)))
+            intros.append(("LEVEL {}  {}".format(level, name),
+                           "{:d} MOVES, {:.1f}s".format(level, time_limit)))
+            time_limit *= speedup
+        self.progress = tuple(progress)
+        self.intros = tuple(intros)
+        self.difficulty = difficulty
@@ -0,0 +1,69 @@
+import random
+
+from bench import measure
+from hud import MOVE_LABELS, Hud
+
+# ---------------------------
+# HUD text benchmark: heap and time for the lines of one full 10-level game.
+# Runs on the device (copy next to hud.py and bench.py and run from the
+# REPL) and on a host:  python3 hudBench.py
+# Heap use is only measured where gc.mem_alloc() exists (CircuitPython).
+# ---------------------------
+
+MOVES = list(MOVE_LABELS)
+MAX_LIVES = 3
+LEVELS = 10
+BASE_TIME = 3.0
+NAME = "EASY"
+
+# The same sequences for both runs: 55 moves over 10 levels
+random.seed(1)
+sequences = [[random.choice(MOVES) for _ in range(level)] for level in range(LEVELS + 1)]
+shown = []   # reused sink so the lines are really built
+lives = MAX_LIVES
+
+
+def show(l1, l2, l4):
+    shown.append(l1)
+    shown.append(l2)
+    shown.append(l4)
+    del shown[:]
+
+
+def legacy_game():
+    """Lines built the way play_game() built them before hud.py."""
+    time_limit = BASE_TIME
+    for level in range(1, LEVELS + 1):
+        show("LEVEL {}  {}".format(level, NAME),
+             "{:d} MOVES, {:.1f}s".format(level, time_limit),
+             "LIVES: " + ("*" * lives))
+        for index, move in enumerate(sequences[level]):
+            show("L{} {}/{} {}".format(level, index + 1, level, NAME),
+                 "DO: " + MOVE_LABELS[move],
+                 "LIVES: " + ("*" * lives))
+        time_limit *= 0.9
+
+
+hud = Hud(MOVE_LABELS, MAX_LIVES, LEVELS)
+hud.prepare("EASY", NAME, BASE_TIME, 0.9)
+
+
+def hud_game():
+    """Table lookups only."""
+    for level in range(1, LEVELS + 1):
+        title, info = hud.intros[level]
+        show(title, info, hud.lives_lines[lives])
+        progress = hud.progress[level]
+        sequence = sequences[level]
+        for index in range(level):
+            show(progress[index], hud.move_lines[sequence[index]], hud.lives_lines[lives])
+
+
+print("HUD text benchmark, one {}-level game ({} moves)".format(
+    LEVELS, sum(len(s) for s in sequences)))
+for name, fn in (("legacy format/concat", legacy_game), ("hud tables", hud_game)):
+    us, heap = measure(fn, warm_up=True)
+    if heap is None:
+        print("{:<21} {:>9.1f} us/game   heap: n/a on this Python".format(name, us))
+    else:
+        print("{:<21} {:>9.1f} us/game   heap: {:>6.0f} bytes/game".format(name, us, heap))
@@ -0,0 +1,133 @@
+# =========================
+#  Shared I2C bus arbiter
+# =========================
+#
+# The SSD1306 and the ADXL345 share busio.I2C on D5/D4, and the game is
+# single-threaded, so sharing the bus means choosing what goes on it next.
+# Sensor reads win. A frame is queued as page-sized chunks, and pump()
+# only sends the next chunk when no sensor read falls due before it would
+# finish, so the "accel" task gets in between two pages instead of
+# waiting for a whole 1 KB frame.
+
+from screen import PAGE_OVERHEAD, WIDTH
+
+# SSD1306 and ADXL345 both support 400 kHz fast mode (busio default: 100 kHz)
+BUS_FREQUENCY = 400000
+
+# One SSD1306 page: window command + control byte + 128 columns
+PAGE_CHUNK_BYTES = PAGE_OVERHEAD + WIDTH
+
+
+def transfer_time(nbytes, frequency=BUS_FREQUENCY):
+    """Seconds on the wire for one transaction: 9 clocks per byte + address."""
+    return (nbytes + 1) * 9 / frequency
+
+
+class BusArbiter:
+    """
+    Orders display chunks around sensor reads and keeps bus statistics.
+
+    The display driver sets `send` (send(chunk) -> bytes written) and
+    queues chunks with start_frame(); the "bus" task calls pump().
+    Functions in `on_frame` are called when the last chunk of a frame is out.
+    """
+
+    def __init__(self, clock, frequency=BUS_FREQUENCY):
+        self.clock = clock
+        self.frequency = frequency
+        self.chunk_time = transfer_time(PAGE_CHUNK_BYTES, frequency)
+        self.sensor_task = None
+        self.send = None
+        self.on_frame = []
+        self.pending = []            # chunks waiting, oldest first
+
+        # Counters
+        self.start = clock()
+        self.busy = 0.0              # seconds the bus was held
+        self.chunks = 0
+        self.deferred = 0            # chunks held back for a sensor read
+        self.sensor_waits = 0        # sensor reads that came due while the display had the bus
+        self.max_wait = 0.0          # worst of those waits, in seconds
+
+    def watch(self, task):
+        """Sensor reads of this scheduler task take priority over display chunks."""
+        self.sensor_task = task
+
+    def _sensor_due(self):
+        task = self.sensor_task
+        if task is None or not task.enabled:
+            return None
+        return task.next_run
+
+    def hold(self, start, end, sensor=False):
+        """Account one transaction that held the bus from start to end."""
+        self.busy += end - start
+        if sensor:
+            return
+        due = self._sensor_due()
+        if due is not None and due < end:
+            wait = end - (due if due > start else start)
+            self.sensor_waits += 1
+            if wait > self.max_wait:
+                self.max_wait = wait
+
+    def transfer(self, fn):
+        """Run fn() as one display transaction that cannot be split."""
+        start = self.clock()
+        result = fn()
+        self.hold(start, self.clock())
+        self._frame_done()
+        return result
+
+    def start_frame(self, chunks):
+        """Queue chunks (page numbers) for pump(); queued ones are not repeated."""
+        pending = self.pending
+        for chunk in chunks:
+            if chunk not in pending:
+                pending.append(chunk)
+
+    def pump(self):
+        """
+        Send the next queued chunk, unless a sensor read falls due first.
+        One chunk per call, so inputs are polled between pages as well.
+        Chunks read the framebuffer when they go out, so the newest
+        content is sent. Returns the bytes written.
+        """
+        pending = self.pending
+        if not pending:
+            return 0
+        now = self.clock()
+        due = self._sensor_due()
+        if due is not None and due <= now + self.chunk_time:
+            self.deferred += 1
+            return 0
+        sent = self.send(pending.pop(0))
+        self.chunks += 1
+        self.hold(now, self.clock())
+        if not pending:
+            self._frame_done()
+        return sent
+
+    def _frame_done(self):
+        for fn in self.on_frame:
+            fn()
+
+    def utilization(self):
+        elapsed = self.clock() - self.start
+        if elapsed <= 0:
+            return 0.0
+        return self.busy / elapsed
+
+    def reset(self):
+        self.start = self.clock()
+        self.busy = 0.0
+        self.chunks = 0
+        self.deferred = 0
+        self.sensor_waits = 0
+        self.max_wait = 0.0
+
+    def report(self):
+        return ("i2c: {} kHz, {:.1%} busy, {} display chunks ({} deferred), "
+                "{} sensor waits, worst {:.2f} ms").format(
+            self.frequency // 1000, self.utilization(), self.chunks, self.deferred,
+            self.sensor_waits, self.max_wait * 1000)
@@ -0,0 +1,161 @@
+import sys
+
+import events
+from encoder import QuadratureDecoder
+from simulator import SimBackend, load_game
+
+# ---------------------------
+# Input checks on the simulated hardware (host only).
+#
+#   python3 inputCheck.py
+#
+# 1) Busy game: short presses of both buttons and encoder turns made
+#    while the NeoPixel flashes and OLED pages are being sent must all
+#    be counted (input_events.totals).
+# 2) Fast spin: SPIN_EDGES quadrature edges SPIN_EDGE_TIME apart, each
+#    way, must give every turn, both through the game (position counter,
+#    as with rotaryio) and through the edge-queue decoding the keypad
+#    fallback in hardware.py does.
+# 3) Bouncy buttons (with FAIL_FAST): a BOUNCE_PRESS press whose contacts
+#    chatter for BOUNCE on both edges completes one PUSH_BTN / PUSH_ENC
+#    move, and the bounce neither fails the TURN_CW move after it nor
+#    completes a second PUSH_BTN / PUSH_ENC prompt before the player
+#    presses again.
+# Exits with status 1 when a check fails.
+# ---------------------------
+
+SEED = 1
+ROUNDS = 60
+TAP = 0.02          # s, a quick press
+ROUND_TIME = 0.1    # s per round: flash + redraw + one input
+SPIN_EDGES = 200
+SPIN_EDGE_TIME = 0.00001   # s, 10 us per edge
+BOUNCE_PRESS = 0.15        # s
+BOUNCE = 0.0005            # s of contact chatter per edge
+
+
+def check_busy_inputs():
+    """Returns (sent per kind, counted per kind, inputs made while busy)."""
+    hw = SimBackend(seed=SEED)
+    game = load_game(hw)
+    game.clear_input_events()
+    before = list(game.input_events.totals)
+    sent = [0] * len(events.NAMES)
+    busy = [0]
+
+    def probe(arg):
+        # the LED effect is running and OLED pages are still queued
+        if game.leds.busy() and hw.bus.pending:
+            busy[0] += 1
+
+    for r in range(ROUNDS):
+        t = hw.now + 0.001
+        game.flash_color(255, 0, 255, 0.15 if r % 2 else 0.3)
+        line = ("#" if r % 2 else "=") * 21     # every column changes
+        game.show_text(line, line, line)
+        game.display.refresh()
+        kind = r % 4
+        if kind == 0:
+            hw.press_button(t, TAP)
+            sent[events.PUSH_BTN] += 1
+        elif kind == 1:
+            hw.press_encoder(t, TAP)
+            sent[events.PUSH_ENC] += 1
+        else:
+            hw.turn(t, 1 if kind == 2 else -1)
+            sent[events.TURN_CW if kind == 2 else events.TURN_CCW] += 1
+        hw.at(t, probe)
+        game.scheduler.run_for(ROUND_TIME)
+    counted = [n - b for n, b in zip(game.input_events.totals, before)]
+    return sent, counted, busy[0]
+
+
+def check_fast_spin():
+    """
+    Returns (CW, CCW) turns counted by the game for one spin each way,
+    and its edges per turn.
+    """
+    hw = SimBackend(seed=SEED)
+    game = load_game(hw)
+    game.clear_input_events()
+    before = list(game.input_events.totals)
+    for direction in (1, -1):
+        hw.turn(hw.now + 0.001, direction, SPIN_EDGES, SPIN_EDGE_TIME)
+        game.scheduler.run_for(0.05)
+    totals = game.input_events.totals
+    return ((totals[events.TURN_CW] - before[events.TURN_CW],
+             totals[events.TURN_CCW] - before[events.TURN_CCW]), game.STEPS_PER_TURN)
+
+
+def check_edge_queue(steps_per_turn):
+    """
+    Returns (CW, CCW) turns from the pin states of one spin each way, every
+    change decoded in order like the keypad event queue delivers them.
+    """
+    hw = SimBackend(seed=SEED)
+    pins = QuadratureDecoder(steps_per_detent=None, state=hw.encoder_state())
+    turns = QuadratureDecoder(steps_per_detent=steps_per_turn)
+    turns.feed_position(pins.position)
+    for direction in (1, -1):
+        t = hw.now + 0.001
+        hw.turn(t, direction, SPIN_EDGES, SPIN_EDGE_TIME)
+        for i in range(SPIN_EDGES):
+            hw.now = t + i * SPIN_EDGE_TIME
+            pins.update(hw.encoder_state())
+        turns.feed_position(pins.position)
+    return turns.turns.count("CW"), turns.turns.count("CCW")
+
+
+def check_bounce():
+    """Returns the names of the bouncy-press scenarios that failed."""
+    hw = SimBackend(seed=SEED)
+    game = load_game(hw)
+    game.FAIL_FAST = True   # a stray press or release is a wrong move
+    game.calibrate_accel()
+    failures = []
+    for move, press in (("PUSH_BTN", hw.press_button), ("PUSH_ENC", hw.press_encoder)):
+        for after in ("TURN_CW", move):
+            game.scheduler.run_for(0.5)
+            game.show_game_text("CHECK", move)
+            press(hw.now + 0.3, BOUNCE_PRESS, BOUNCE)
+            first = game.wait_for_move(move, 2.0)
+            # The next prompt is up while the button is still held
+            t = hw.now + 0.4
+            if after == move:
+                press(t, BOUNCE_PRESS, BOUNCE)
+            else:
+                hw.turn(t, 1)
+            game.show_game_text("CHECK", after)
+            second = game.wait_for_move(after, 2.0)
+            if not (first and second and hw.now >= t):
+                failures.append("{} then {}".format(move, after))
+    return failures
+
+
+failed = False
+
+sent, counted, busy = check_busy_inputs()
+ok = sent == counted and busy == ROUNDS
+failed = failed or not ok
+print("busy inputs: {} sent, {} counted, {} made while flashing and sending: {}".format(
+    sum(sent), sum(counted), busy, "ok" if ok else "FAILED"))
+for kind in range(len(events.NAMES)):
+    if sent[kind] or counted[kind]:
+        print("  {:<10} sent {:>3}  counted {:>3}".format(
+            events.NAMES[kind].lower(), sent[kind], counted[kind]))
+
+spins, steps = check_fast_spin()
+expected = SPIN_EDGES // steps
+for name, (cw, ccw) in (("fast spin", spins), ("edge queue", check_edge_queue(steps))):
+    ok = cw == expected and ccw == expected
+    failed = failed or not ok
+    print("{}: {} edges at {:.0f} us/edge each way, {}/{} CW and {}/{} CCW turns: {}".format(
+        name, SPIN_EDGES, SPIN_EDGE_TIME * 1e6, cw, expected, ccw, expected,
+        "ok" if ok else "FAILED"))
+
+failures = check_bounce()
+failed = failed or bool(failures)
+print("bouncy buttons: {:.0f} ms presses, {:.1f} ms bounce: {}".format(
+    BOUNCE_PRESS * 1000, BOUNCE * 1000, "FAILED " + ", ".join(failures) if failures else "ok"))
+
+sys.exit(1 if failed else 0)
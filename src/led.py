@@ -0,0 +1,127 @@
+# =========================
+#  NeoPixel effects engine
+# =========================
+#
+# One timed effect at a time (flash, blink, pulse, fade) on top of a base
+# color. The "led" scheduler task calls update(now); nothing here sleeps.
+# The pixel is only written when the color really changes, so setting the
+# same color over and over (or a slow fade) costs no LED traffic.
+
+FLASH = 1
+BLINK = 2
+PULSE = 3
+FADE = 4
+
+
+def _scale(color, num, den):
+    return (color[0] * num // den, color[1] * num // den, color[2] * num // den)
+
+
+class LedEffects:
+    """Base color plus one running effect, written through `write(color)`."""
+
+    def __init__(self, write, clock):
+        self.write = write
+        self.clock = clock
+        self.base = (0, 0, 0)
+        self.shown = None        # last color written to the pixel
+        self.effect = None
+        self.start = 0.0
+        self.end = None          # None = runs until replaced
+        self.color = (0, 0, 0)
+        self.color2 = (0, 0, 0)  # fade start color
+        self.on = 0.0            # blink on time / pulse period
+        self.off = 0.0           # blink off time
+
+        # Counters
+        self.writes = 0
+        self.skipped = 0         # writes avoided (same color)
+
+    def _show(self, color):
+        if color == self.shown:
+            self.skipped += 1
+            return
+        self.shown = color
+        self.write(color)
+        self.writes += 1
+
+    def _begin(self, effect, color, duration):
+        self.effect = effect
+        self.color = color
+        self.start = self.clock()
+        self.end = None if duration is None else self.start + duration
+        self.update(self.start)
+
+    def set_base(self, color):
+        """Solid color, shown now or once the running effect ends."""
+        self.base = color
+        if self.effect is None:
+            self._show(color)
+
+    def flash(self, color, duration=0.15):
+        self._begin(FLASH, color, duration)
+
+    def blink(self, color, on=0.15, off=0.15, count=3):
+        """`count` on/off cycles of `color`, then back to the base color."""
+        self.on = on
+        self.off = off
+        self._begin(BLINK, color, count * (on + off))
+
+    def pulse(self, color, period=1.0, duration=None):
+        """Breathe between dim and full `color`, `period` seconds per cycle."""
+        self.on = period
+        self._begin(PULSE, color, duration)
+
+    def fade(self, color, duration=1.0):
+        """Fade from the color on the pixel to `color`, which becomes the base."""
+        self.color2 = self.shown or (0, 0, 0)
+        self.base = color
+        self._begin(FADE, color, duration)
+
+    def stop(self):
+        """End the running effect and show the base color."""
+        self.effect = None
+        self._show(self.base)
+
+    def redraw(self):
+        """Write the current color again, e.g. once the pixel has been started."""
+        color = self.shown
+        self.shown = None
+        if color is not None:
+            self._show(color)
+
+    def busy(self):
+        return self.effect is not None
+
+    def update(self, now):
+        """Advance the running effect to `now` (the "led" task)."""
+        effect = self.effect
+        if effect is None:
+            return
+        if self.end is not None and now >= self.end:
+            self.stop()
+            return
+        t = now - self.start
+        if effect == FLASH:
+            self._show(self.color)
+        elif effect == BLINK:
+            if t % (self.on + self.off) < self.on:
+                self._show(self.color)
+            else:
+                self._show((0, 0, 0))
+        elif effect == PULSE:
+            # Triangle wave 1/8 .. 8/8 brightness, in steps of 1/32
+            phase = int(t / self.on * 64) % 64
+            level = phase if phase < 32 else 63 - phase
+            self._show(_scale(self.color, 4 + level * 28 // 31, 32))
+        else:
+            # Linear fade in 32 steps (no write between steps)
+            step = int(t / (self.end - self.start) * 32)
+            a = self.color2
+            b = self.color
+            self._show((a[0] + (b[0] - a[0]) * step // 32,
+                        a[1] + (b[1] - a[1]) * step // 32,
+                        a[2] + (b[2] - a[2]) * step // 32))
+
+    def report(self):
+        return "led: {} writes, {} skipped".format(self.writes, self.skipped)
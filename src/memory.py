@@ -0,0 +1,113 @@
+import array
+import gc
+import time
+
+# =========================
+#  Garbage collection at safe points
+# =========================
+#
+# A collection can stop the game for several milliseconds. We collect on
+# purpose where a pause is harmless (level intros, menus, losing a life)
+# and keep automatic collection off while a move is being timed.
+# With automatic collection off an allocation that does not fit fails
+# instead, so the heap a move needs is measured: the first move runs with
+# collection on, and each one after that needs `headroom` plus MARGIN
+# times the worst allocation rate seen so far over its time limit. If the
+# heap is lower than that we collect first, and if it still is the move
+# runs with collection on.
+
+
+class GcManager:
+    """Safe-point collections plus free heap and GC time per level."""
+
+    MARGIN = 2
+
+    def __init__(self, levels=10, headroom=8192):
+        self.headroom = headroom
+        self.mem_free = getattr(gc, "mem_free", None)   # CircuitPython only
+        self.mem_alloc = getattr(gc, "mem_alloc", None)
+        self.rate = None         # worst heap allocation in a move, bytes/s (kept across games)
+        self.left_on = 0         # moves timed with automatic collection on
+        self._alloc = 0
+        self._start = 0.0
+        self.free = array.array("l", [-1] * (levels + 1))   # free heap after the level's collect
+        self.gc_us = array.array("l", [0] * (levels + 1))   # GC time spent in each level
+        self.level = 0
+        self.collections = 0
+        self.forced = 0          # collections at a move start because the heap was low
+        self.max_us = 0
+
+    def reset(self):
+        for i in range(len(self.free)):
+            self.free[i] = -1
+            self.gc_us[i] = 0
+        self.level = 0
+        self.collections = 0
+        self.forced = 0
+        self.left_on = 0
+        self.max_us = 0
+
+    def collect(self):
+        """Collect now and book the time to the current level."""
+        start = time.monotonic_ns()
+        gc.collect()
+        us = (time.monotonic_ns() - start) // 1000
+        self.collections += 1
+        self.gc_us[self.level] += us
+        if us > self.max_us:
+            self.max_us = us
+        if self.mem_free is not None:
+            self.free[self.level] = self.mem_free()
+
+    def start_level(self, level):
+        """Level intro: a safe point, and the start of the level's record."""
+        if level < len(self.free):
+            self.level = level
+        self.collect()
+
+    def move_start(self, limit):
+        """
+        No automatic collection until move_end() if the heap has room for
+        a move of up to `limit` seconds.
+        """
+        if self.mem_free is None:
+            gc.disable()     # host: nothing to measure
+            return
+        if self.rate is not None:
+            need = self.headroom + int(self.rate * limit * self.MARGIN)
+            if self.mem_free() < need:
+                self.forced += 1
+                self.collect()
+            if self.mem_free() >= need:
+                gc.disable()
+            else:
+                self.left_on += 1
+        else:
+            self.left_on += 1     # first move: measure it
+        self._start = time.monotonic()
+        self._alloc = self.mem_alloc()
+
+    def move_end(self):
+        gc.enable()
+        if self.mem_alloc is None:
+            return
+        used = self.mem_alloc() - self._alloc
+        seconds = time.monotonic() - self._start
+        if used > 0 and seconds > 0:
+            rate = used / seconds
+            if self.rate is None or rate > self.rate:
+                self.rate = rate
+
+    def report(self):
+        lines = ["gc: {} collections ({} forced at a move start), worst {} us".format(
+            self.collections, self.forced, self.max_us)]
+        if self.rate is not None:
+            lines.append("  moves allocate up to {:.0f} bytes/s, {} timed with gc on".format(
+                self.rate, self.left_on))
+        for level in range(1, len(self.free)):
+            if self.free[level] < 0 and self.gc_us[level] == 0:
+                continue
+            free = "n/a" if self.free[level] < 0 else self.free[level]
+            lines.append("  L{:<2} free {:>7} bytes   gc {:>6} us".format(
+                level, free, self.gc_us[level]))
+        return "\n".join(lines)
@@ -0,0 +1,113 @@
+import time
+
+# =========================
+#  Section profiler
+# =========================
+#
+# Counts calls, total time and worst time for named sections of the loop.
+# Wrapping is decided once, when a function is decorated: with the
+# profiler disabled the decorator hands back the function itself and
+# timer() a shared do-nothing context manager, so the game pays nothing.
+#
+#   profiler = Profiler(enabled=True)
+#
+#   @profiler.section("set_color")
+#   def set_color(r, g, b): ...
+#
+#   check = profiler.timer("move_check")
+#   with check:
+#       ...
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+class _Timer:
+    """Context manager that adds its run time to one stats entry."""
+
+    def __init__(self, stats, clock):
+        self.stats = stats
+        self.clock = clock
+        self.start = 0
+
+    def __enter__(self):
+        self.start = self.clock()
+        return self
+
+    def __exit__(self, *exc):
+        t = self.clock() - self.start
+        stats = self.stats
+        stats[0] += 1
+        stats[1] += t
+        if t > stats[2]:
+            stats[2] = t
+        return False
+
+
+class Profiler:
+    """Per-section [calls, total ns, max ns], reported over serial."""
+
+    def __init__(self, enabled=False, clock=time.monotonic_ns):
+        self.enabled = enabled
+        self.clock = clock
+        self.stats = {}
+
+    def _entry(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = [0, 0, 0]
+            self.stats[name] = stats
+        return stats
+
+    def section(self, name):
+        """Decorator: time every call of the function under `name`."""
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+            stats = self._entry(name)
+            clock = self.clock
+
+            def timed(*args, **kwargs):
+                start = clock()
+                result = fn(*args, **kwargs)
+                t = clock() - start
+                stats[0] += 1
+                stats[1] += t
+                if t > stats[2]:
+                    stats[2] = t
+                return result
+            return timed
+        return decorate
+
+    def timer(self, name):
+        """Context manager for a block inside a function (create it once)."""
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self._entry(name), self.clock)
+
+    def reset(self):
+        for stats in self.stats.values():
+            stats[0] = 0
+            stats[1] = 0
+            stats[2] = 0
+
+    def report(self):
+        """Sections sorted by total time, in microseconds."""
+        if not self.enabled:
+            return "profiler: disabled"
+        lines = ["section                 calls   total us    avg us    max us"]
+        for name, stats in sorted(self.stats.items(), key=lambda kv: -kv[1][1]):
+            calls, total, worst = stats
+            if calls == 0:
+                continue
+            lines.append("{:<22} {:>6} {:>10} {:>9.1f} {:>9}".format(
+                name, calls, total // 1000, total / calls / 1000, worst // 1000))
+        return "\n".join(lines)
@@ -0,0 +1,144 @@
+import gc
+import random
+import time
+
+import board
+import busio
+import displayio
+import terminalio
+
+from hud import MOVE_LABELS, Hud
+from screen import PAGES, DirtyPages
+
+# ---------------------------
+# OLED rendering benchmark: the frames of one 10-level game, drawn
+# 1) by four displayio labels (text set + display.refresh()), and
+# 2) by ssd1306.py: glyphs blitted into the framebuffer, dirty columns
+#    sent from it page by page.
+# Device only (copy next to hud.py, screen.py and ssd1306.py and run
+# from the REPL, with code.py not running). Prints time per frame,
+# heap taken by each renderer (its driver libraries included: both are
+# imported in setup) and heap allocated per frame.
+# ---------------------------
+
+MOVES = list(MOVE_LABELS)
+MAX_LIVES = 3
+LEVELS = 10
+
+# The same frames for both renderers: (row 0, row 1, row 3) per screen
+random.seed(1)
+hud = Hud(MOVE_LABELS, MAX_LIVES, LEVELS)
+hud.prepare("EASY", "EASY", 3.0, 0.9)
+frames = []
+lives = MAX_LIVES
+for level in range(1, LEVELS + 1):
+    title, info = hud.intros[level]
+    frames.append((title, info, hud.lives_lines[lives]))
+    for index in range(level):
+        if random.random() < 0.1 and lives > 1:
+            lives -= 1
+        frames.append((hud.progress[level][index], hud.move_lines[random.choice(MOVES)],
+                       hud.lives_lines[lives]))
+
+
+def run(setup, draw, send):
+    """
+    Returns (heap taken by setup(), render us/frame, send us/frame,
+    heap bytes/frame). draw() puts one frame into the renderer, send()
+    gets it onto the panel.
+    """
+    gc.collect()
+    before = gc.mem_alloc()
+    setup()
+    gc.collect()
+    static = gc.mem_alloc() - before
+    for rows in frames:      # warm up: glyphs, label tiles
+        draw(rows)
+        send()
+    gc.collect()
+    gc.disable()
+    before = gc.mem_alloc()
+    render = 0
+    sending = 0
+    for rows in frames:
+        start = time.monotonic_ns()
+        draw(rows)
+        mid = time.monotonic_ns()
+        send()
+        sending += time.monotonic_ns() - mid
+        render += mid - start
+    allocated = gc.mem_alloc() - before
+    gc.enable()
+    n = len(frames)
+    return static, render / n / 1000, sending / n / 1000, allocated / n
+
+
+displayio.release_displays()
+i2c = busio.I2C(board.D5, board.D4, frequency=400_000)
+state = {}
+
+
+# --- ssd1306.py: framebuffer blit ---
+
+def blit_setup():
+    from ssd1306 import Ssd1306
+    state["oled"] = Ssd1306(i2c, terminalio.FONT)
+    state["dirty"] = DirtyPages()
+
+
+def blit_draw(rows):
+    oled = state["oled"]
+    dirty = state["dirty"]
+    for row, text in ((0, rows[0]), (1, rows[1]), (3, rows[2])):
+        lo, hi = dirty.mark_row(row, text)
+        oled.draw_row(row, text, lo, hi)
+
+
+def blit_send():
+    oled = state["oled"]
+    dirty = state["dirty"]
+    for page in range(PAGES):
+        if dirty.hi[page]:
+            lo, hi = dirty.take(page)
+            oled.send_page(page, lo, hi)
+
+
+# --- displayio labels ---
+
+def labels_setup():
+    import i2cdisplaybus
+    import adafruit_displayio_ssd1306
+    from adafruit_display_text import label
+    display_bus = i2cdisplaybus.I2CDisplayBus(i2c, device_address=0x3C)
+    display = adafruit_displayio_ssd1306.SSD1306(display_bus, width=128, height=64)
+    display.auto_refresh = False
+    group = displayio.Group()
+    for row in range(4):
+        group.append(label.Label(terminalio.FONT, text="", anchor_point=(0, 0),
+                                 anchored_position=(0, 16 * row)))
+    display.root_group = group
+    state["display"] = display
+    state["group"] = group
+
+
+def labels_draw(rows):
+    group = state["group"]
+    for row, text in ((0, rows[0]), (1, rows[1]), (3, rows[2])):
+        if group[row].text != text:
+            group[row].text = text
+
+
+def labels_send():
+    state["display"].refresh()
+
+
+print("OLED render benchmark, {} frames".format(len(frames)))
+print("{:<18} {:>8} {:>11} {:>9} {:>11}".format(
+    "", "heap", "render us", "send us", "bytes/frame"))
+for name, setup, draw, send in (("ssd1306 blit", blit_setup, blit_draw, blit_send),
+                                ("displayio labels", labels_setup, labels_draw, labels_send)):
+    state.clear()     # drop the previous renderer before measuring this one
+    static, render, sending, allocated = run(setup, draw, send)
+    print("{:<18} {:>8} {:>11.0f} {:>9.0f} {:>11.0f}".format(
+        name, static, render, sending, allocated))
+displayio.release_displays()
@@ -0,0 +1,368 @@
+import struct
+
+# =========================
+#  Session recorder and replayer
+# =========================
+#
+# A recording is one game: the random seed, every sequence, and the raw
+# inputs as the game saw them (encoder steps, switch and button edges,
+# accelerometer samples in raw counts, activity interrupts), each with
+# its time in us since the game started. Records are fixed size and go
+# into a RAM ring, so a long game keeps its most recent part; save()
+# writes it to flash (or a host file) after the game.
+#
+# ReplayBackend wraps a backend (HardwareBackend or SimBackend) and
+# serves those inputs again at the recorded times, so the same game is
+# played on the host or on the device and can be compared with the
+# recording (see compare()). The game calls sync() at SYNC_KINDS points.
+#
+# File: header (HEADER) followed by `count` records (RECORD), oldest first.
+
+MAGIC = b"RREC"
+VERSION = 4
+HEADER = "<4sBBHIIf"     # magic, version, flags, record size, seed, record count, accel scale
+DROPPED = 0x01           # flag: the ring was full, the start of the game is missing
+STREAM = 0x02            # flag: accelerometer in FIFO stream mode
+RECORD = "<IBhhh"        # t_us, kind, a, b, c
+RECORD_SIZE = struct.calcsize(RECORD)
+
+# Record kinds
+ENC = 1        # a = encoder position change (edges)
+ENC_SW = 2     # a = encoder switch pin (1 = released)
+BUTTON = 3     # a = push button pin (1 = released)
+ACCEL = 4      # a, b, c = x, y, z raw counts (y = z = 0 for X-only reads)
+ACTIVITY = 5   # the armed activity interrupt fired
+MOVE = 6       # a = level, b = index in the sequence, c = move number
+LIFE = 7       # a = level, b = lives left
+END = 8        # a = 1 won, 0 lost
+CALIBRATE = 9  # calibration starts
+PROMPT = 10    # a move is shown, a = move number, b = X baseline (raw counts)
+DONE = 11      # the move ended, a = 1 detected, 0 timed out, 2 wrong move
+SAVED = 12     # a, b, c = baseline saved by an earlier calibration (raw counts)
+BASELINE = 13  # calibration done, a, b, c = baseline (raw counts)
+
+KIND_NAMES = {ENC: "enc", ENC_SW: "enc_sw", BUTTON: "button", ACCEL: "accel",
+              ACTIVITY: "activity", MOVE: "move", LIFE: "life", END: "end",
+              CALIBRATE: "calibrate", PROMPT: "prompt", DONE: "done",
+              SAVED: "saved", BASELINE: "baseline"}
+
+# Points in the game the replay lines up on: the recorded inputs after
+# one are only played once the replayed game has got there too, with the
+# time counted from there. A few ms of drift per move (a replay tick does
+# not take exactly as long as the recorded one) then cannot move an input
+# into the wrong move. Inputs the game did not watch during a move are
+# recorded when it looks again, at the DONE time.
+SYNC_KINDS = (CALIBRATE, PROMPT, DONE)
+
+# Game events compared between a recording and its replay
+OUTCOME_KINDS = (MOVE, LIFE, END)
+
+
+class Recorder:
+    """The current game's records in a preallocated ring of `size` bytes."""
+
+    def __init__(self, clock, scale, size=24 * 1024):
+        self.clock = clock           # monotonic_ns
+        self.scale = scale           # m/s^2 per raw accelerometer count
+        self.capacity = size // RECORD_SIZE
+        self.buffer = bytearray(self.capacity * RECORD_SIZE)
+        self.enabled = True
+        self.stream = True           # accelerometer mode, saved with the game
+        self.seed = 0
+        self.start_ns = clock()
+        self.index = 0               # where the next record goes
+        self.count = 0               # records written this game
+
+    def start(self, seed):
+        """New game: forget the old records, times count from now."""
+        self.seed = seed
+        self.start_ns = self.clock()
+        self.index = 0
+        self.count = 0
+
+    def add(self, kind, a=0, b=0, c=0):
+        self.add_at(self.clock(), kind, a, b, c)
+
+    def add_at(self, ns, kind, a=0, b=0, c=0):
+        """Record with a time the caller already took (no extra clock read)."""
+        if not self.enabled:
+            return
+        t_us = ((ns - self.start_ns) // 1000) & 0xFFFFFFFF
+        struct.pack_into(RECORD, self.buffer, self.index * RECORD_SIZE, t_us, kind, a, b, c)
+        self.index += 1
+        if self.index == self.capacity:
+            self.index = 0
+        self.count += 1
+
+    def accel(self, ns, x, y, z):
+        """One reading in m/s^2, kept as raw counts."""
+        scale = self.scale
+        self.add_at(ns, ACCEL, int(round(x / scale)), int(round(y / scale)), int(round(z / scale)))
+
+    def accel_raw(self, ns, raw, n):
+        """n samples of raw counts, x/y/z interleaved in `raw`, all read at ns."""
+        if not self.enabled:
+            return
+        for i in range(0, 3 * n, 3):
+            self.add_at(ns, ACCEL, raw[i], raw[i + 1], raw[i + 2])
+
+    def wrapped(self):
+        """True if the oldest records of this game were overwritten."""
+        return self.count > self.capacity
+
+    def records(self):
+        """(t_us, kind, a, b, c) tuples, oldest first."""
+        n = min(self.count, self.capacity)
+        first = self.index - n if n < self.capacity else self.index
+        out = []
+        for i in range(n):
+            offset = ((first + i) % self.capacity) * RECORD_SIZE
+            out.append(struct.unpack_from(RECORD, self.buffer, offset))
+        return out
+
+    def save(self, path):
+        """Write the game to `path`. Returns the bytes written."""
+        n = min(self.count, self.capacity)
+        first = self.index - n if n < self.capacity else self.index
+        with open(path, "wb") as f:
+            flags = (DROPPED if self.wrapped() else 0) | (STREAM if self.stream else 0)
+            f.write(struct.pack(HEADER, MAGIC, VERSION, flags, RECORD_SIZE, self.seed, n, self.scale))
+            # Oldest first: the part after `first`, then the part before it
+            if first + n <= self.capacity:
+                f.write(memoryview(self.buffer)[first * RECORD_SIZE:(first + n) * RECORD_SIZE])
+            else:
+                f.write(memoryview(self.buffer)[first * RECORD_SIZE:])
+                f.write(memoryview(self.buffer)[:self.index * RECORD_SIZE])
+        return struct.calcsize(HEADER) + n * RECORD_SIZE
+
+    def report(self):
+        return "recording: seed {}, {} records ({} bytes){}".format(
+            self.seed, min(self.count, self.capacity),
+            min(self.count, self.capacity) * RECORD_SIZE,
+            ", oldest dropped" if self.wrapped() else "")
+
+
+class Recording:
+    """A saved game: its seed, accelerometer scale (m/s^2 per count) and records."""
+
+    def __init__(self, seed, scale, records, dropped=False, stream=True):
+        self.seed = seed
+        self.scale = scale
+        self.records = records
+        self.dropped = dropped       # the first records are missing
+        self.stream = stream         # recorded with the accelerometer FIFO
+
+
+def load(path):
+    """Read a file written by Recorder.save()."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, flags, size, seed, count, scale = struct.unpack_from(HEADER, data, 0)
+    if magic != MAGIC or version != VERSION or size != RECORD_SIZE:
+        raise ValueError("not a version {} recording: {}".format(VERSION, path))
+    offset = struct.calcsize(HEADER)
+    records = []
+    for i in range(count):
+        records.append(struct.unpack_from(RECORD, data, offset + i * RECORD_SIZE))
+    return Recording(seed, scale, records, bool(flags & DROPPED), bool(flags & STREAM))
+
+
+def compare(recorded, replayed):
+    """
+    Compare the game events (sequences, lost lives, result) of two record
+    lists. Returns None if they match, else a line about the first difference.
+    """
+    a = [r for r in recorded if r[1] in OUTCOME_KINDS]
+    b = [r for r in replayed if r[1] in OUTCOME_KINDS]
+    for i in range(min(len(a), len(b))):
+        if a[i][1:] != b[i][1:]:
+            return "event {} differs: recorded {} {} at {} us, replayed {} {} at {} us".format(
+                i, KIND_NAMES[a[i][1]], a[i][2:], a[i][0],
+                KIND_NAMES[b[i][1]], b[i][2:], b[i][0])
+    if len(a) != len(b):
+        return "recorded {} game events, replayed {}".format(len(a), len(b))
+    return None
+
+
+class ReplayBackend:
+    """
+    Inputs from a Recording, everything else (clock, OLED, bus, LED) from
+    `backend`. rewind() starts the recorded inputs at the current time;
+    before that the inputs are at rest.
+    """
+
+    def __init__(self, backend, recording):
+        self.backend = backend
+        self.recording = recording
+        self.records = recording.records
+        self.scale = recording.scale
+        # The scheduler idles only if the backend does (the simulator)
+        self.idle = self._idle if backend.idle is not None else None
+        self.start_ns = None
+        self.rest = (0, 0, 0)
+        for record in self.records:
+            if record[1] == ACCEL:
+                self.rest = record[2:]
+                break
+        self.saved = None            # the baseline the recorded game found saved
+        for record in self.records:
+            if record[1] == SAVED:
+                self.saved = record[2:]
+                break
+        self._reset()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def _reset(self):
+        self.index = 0
+        self.position = 0
+        self.enc_sw = True
+        self.button = True
+        self.samples = []            # recorded samples due, not read yet
+        self.drains = []             # how many of them each recorded FIFO drain read
+        self.sample_us = -1          # time of the last recorded sample
+        self.last = self.rest
+        self.activity = False
+
+    def rewind(self):
+        """Play the recorded inputs from now on. Returns the recorded seed."""
+        self._reset()
+        self.start_ns = self.backend.monotonic_ns()
+        return self.recording.seed
+
+    def _apply(self, record):
+        t_us, kind, a, b, c = record
+        if kind == ENC:
+            self.position += a
+        elif kind == ENC_SW:
+            self.enc_sw = bool(a)
+        elif kind == BUTTON:
+            self.button = bool(a)
+        elif kind == ACCEL:
+            self.samples.append((a, b, c))
+            if t_us == self.sample_us:
+                self.drains[-1] += 1
+            else:
+                self.drains.append(1)
+                self.sample_us = t_us
+        elif kind == ACTIVITY:
+            self.activity = True
+
+    def _advance(self):
+        """Apply every record that is due by now, up to the next sync point."""
+        if self.start_ns is None:
+            return
+        records = self.records
+        now_us = (self.backend.monotonic_ns() - self.start_ns) // 1000
+        while self.index < len(records) and records[self.index][0] <= now_us:
+            if records[self.index][1] in SYNC_KINDS:
+                return   # wait for the game's sync()
+            self._apply(records[self.index])
+            self.index += 1
+
+    def sync(self, kind):
+        """
+        The game reached a `kind` sync point: play what is left before the
+        recorded one now and count the time from here.
+        """
+        records = self.records
+        while self.index < len(records):
+            record = records[self.index]
+            self.index += 1
+            if record[1] == kind:
+                self.start_ns = self.backend.monotonic_ns() - record[0] * 1000
+                # The recorded game had read these before it got here
+                del self.samples[:]
+                del self.drains[:]
+                return
+            if record[1] not in SYNC_KINDS:
+                self._apply(record)
+
+    def _idle(self, until):
+        """Never skip past the next recorded input."""
+        if self.start_ns is not None and self.index < len(self.records):
+            t_us, kind = self.records[self.index][:2]
+            if kind not in SYNC_KINDS:
+                due = (self.start_ns + t_us * 1000) / 1000000000
+                if until is None or due < until:
+                    until = due
+        self.backend.idle(until)
+
+    # --- inputs ---
+
+    def encoder_position(self):
+        self._advance()
+        return self.position
+
+    def encoder_switch(self):
+        self._advance()
+        return self.enc_sw
+
+    def button_value(self):
+        self._advance()
+        return self.button
+
+    # The backend's sensor is still read, so the replay spends the same
+    # bus time as the recorded game and its ticks stay in step with the
+    # recorded samples; its values are then replaced by the recorded ones.
+
+    def _sample(self):
+        self._advance()
+        if self.samples:
+            self.last = self.samples.pop(0)
+            self._drained(1)
+        scale = self.scale
+        last = self.last
+        return (last[0] * scale, last[1] * scale, last[2] * scale)
+
+    def acceleration(self):
+        self.backend.acceleration()
+        return self._sample()
+
+    def acceleration_x(self):
+        self.backend.acceleration_x()
+        return self._sample()[0]
+
+    def _drained(self, n):
+        drains = self.drains
+        drains[0] -= n
+        if not drains[0]:
+            drains.pop(0)
+
+    def accel_fifo_into(self, out):
+        """
+        At most one recorded drain per call: a late tick must not merge
+        two, or the game filters (and tracks its baseline) differently.
+        """
+        self.backend.accel_fifo_into(out)
+        self._advance()
+        samples = self.samples
+        if not samples:
+            return 0
+        n = min(self.drains[0], len(out) // 3)
+        for i in range(n):
+            x, y, z = samples[i]
+            out[3 * i] = x
+            out[3 * i + 1] = y
+            out[3 * i + 2] = z
+        del samples[:n]
+        self._drained(n)
+        return n
+
+    def accel_activity_arm(self, threshold):
+        self.activity = False
+        self.backend.accel_activity_arm(threshold)
+
+    def accel_activity(self):
+        self.backend.accel_activity()
+        self._advance()
+        return self.activity
+
+    # --- saved calibration ---
+
+    def load_baseline(self):
+        return self.saved
+
+    def save_baseline(self, counts):
+        pass     # a replay leaves the saved baseline alone
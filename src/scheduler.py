@@ -0,0 +1,88 @@
+import time
+
+# =========================
+#  Cooperative tick scheduler
+# =========================
+#
+# Each task is a plain function with its own period (in seconds).
+# The game calls tick() as often as it can. Nothing in here sleeps,
+# so input sampling keeps running while an LED flash or a screen
+# update is still pending.
+
+
+class Task:
+    """One periodic job: fn(now) is called every `period` seconds."""
+
+    def __init__(self, name, period, fn):
+        self.name = name
+        self.period = period
+        self.fn = fn
+        self.next_run = 0.0
+        self.enabled = True
+
+
+class Scheduler:
+    """
+    Hand-rolled tick loop.
+    Period 0 means "run on every tick" (used for input sampling).
+
+    `idle` is an optional hook called after every tick with the time the
+    next periodic task is due. On the device it is None (keep polling);
+    the simulator uses it to jump its virtual clock forward.
+    """
+
+    def __init__(self, clock=time.monotonic, idle=None):
+        self.clock = clock
+        self.idle = idle
+        self.tasks = []
+        self.ticks = 0    # tick() calls, for loop-rate measurements
+
+    def add(self, name, period, fn):
+        """Register a task and return it (so callers can enable/disable it)."""
+        task = Task(name, period, fn)
+        self.tasks.append(task)
+        return task
+
+    def next_due(self):
+        """Earliest next_run of the enabled periodic (period > 0) tasks."""
+        due = None
+        for task in self.tasks:
+            if task.enabled and task.period > 0:
+                if due is None or task.next_run < due:
+                    due = task.next_run
+        return due
+
+    def tick(self, deadline=None):
+        """Run every task that is due. Returns the time used for this tick."""
+        now = self.clock()
+        self.ticks += 1
+        for task in self.tasks:
+            if task.enabled and now >= task.next_run:
+                task.next_run = now + task.period
+                task.fn(now)
+        if self.idle is not None:
+            due = self.next_due()
+            if deadline is not None and (due is None or deadline < due):
+                due = deadline
+            self.idle(due)
+        return now
+
+    def run_for(self, seconds):
+        """Keep ticking for `seconds` (replacement for time.sleep)."""
+        end = self.clock() + seconds
+        while self.tick(end) < end:
+            pass
+
+    def run_until(self, done, timeout=None):
+        """
+        Keep ticking until done() is True or `timeout` seconds passed.
+        Returns True if done() became True, False on timeout.
+        """
+        start = self.clock()
+        end = None if timeout is None else start + timeout
+        while True:
+            now = self.tick(end)
+            if done():
+                return True
+            if timeout is not None and now - start >= timeout:
+                return False
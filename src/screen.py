@@ -0,0 +1,213 @@
+# =========================
+#  OLED display manager
+# =========================
+#
+# Keeps a copy of the text that is on each label, only touches labels
+# whose text really changed, and folds every change made between two
+# "display" task runs into a single refresh.
+
+LINES = 4
+
+# Rough heap cost of one pre-built text row (label + glyph tiles)
+ROW_BYTES = 1024
+
+# OLED geometry: 8 pages of 8 px, two pages per 16 px text row, 6 px glyphs
+# (also used by ssd1306.py)
+PAGES = 8
+ROW_PAGES = 2
+WIDTH = 128
+CHAR_WIDTH = 6
+
+# Bytes in one full SSD1306 frame (128 x 64, one bit per pixel)
+FRAME_BYTES = WIDTH * PAGES
+
+# Per page sent: column/page window command (7 bytes) + data control byte
+PAGE_OVERHEAD = 7 + 1
+
+
+class LruCache:
+    """
+    Small least-recently-used cache (dict + usage order list).
+    Used by the backends to keep pre-built text rows keyed by (row, text).
+    Pinned entries (the pre-rendered screens) are never evicted and do
+    not count against `capacity`.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = {}
+        self.order = []      # evictable keys, least recently used first
+        self.pinned = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        order = self.order
+        if order and order[-1] != key and key in order:
+            order.remove(key)
+            order.append(key)
+        return value
+
+    def put(self, key, value, pin=False):
+        if key in self.items:
+            if key in self.order:
+                self.order.remove(key)
+        elif not pin and len(self.order) >= self.capacity:
+            old = self.order.pop(0)
+            del self.items[old]
+            self.evictions += 1
+        self.items[key] = value
+        if pin:
+            self.pinned += 1
+        else:
+            self.order.append(key)
+
+    def report(self):
+        return "row cache: {} hits, {} misses, {} evictions, {} pinned + {}/{} rows".format(
+            self.hits, self.misses, self.evictions, self.pinned,
+            len(self.order), self.capacity)
+
+
+def cache_capacity(low=8, high=32):
+    """How many rows to keep: a quarter of the free heap, within [low, high]."""
+    try:
+        import gc
+        free = gc.mem_free()
+    except (ImportError, AttributeError):
+        return high    # host: memory is not the limit
+    n = free // 4 // ROW_BYTES
+    if n < low:
+        return low
+    if n > high:
+        return high
+    return n
+
+
+class DirtyPages:
+    """
+    Which SSD1306 pages changed, and which columns [lo, hi) of each must
+    be resent. Text rows start at x = 0 in fixed 6 px cells, so a change
+    only touches the cells from the first differing character to the end
+    of the longer text (or to the last differing one, for equal lengths).
+    Everything starts dirty so the first refresh clears the whole panel.
+    mark_row() returns the changed columns, for the page driver to redraw.
+    """
+
+    def __init__(self):
+        self.lo = bytearray(PAGES)               # first column to send
+        self.hi = bytearray([WIDTH] * PAGES)     # end column, 0 = page is clean
+        self.text = [""] * LINES                 # text currently in each row
+
+    def mark_row(self, row, text):
+        old = self.text[row]
+        self.text[row] = text
+        n = min(len(old), len(text))
+        first = 0
+        while first < n and old[first] == text[first]:
+            first += 1
+        if len(old) == len(text):
+            if first == n:
+                return 0, 0
+            last = n
+            while old[last - 1] == text[last - 1]:
+                last -= 1
+        else:
+            last = max(len(old), len(text))
+        lo = min(first * CHAR_WIDTH, WIDTH)
+        hi = min(last * CHAR_WIDTH, WIDTH)
+        if lo >= hi:
+            return 0, 0
+        page = row * ROW_PAGES
+        for p in range(page, page + ROW_PAGES):
+            if self.hi[p] == 0:
+                self.lo[p] = lo
+                self.hi[p] = hi
+            else:
+                if lo < self.lo[p]:
+                    self.lo[p] = lo
+                if hi > self.hi[p]:
+                    self.hi[p] = hi
+        return lo, hi
+
+    def pages(self):
+        """Dirty page numbers."""
+        return [p for p in range(PAGES) if self.hi[p]]
+
+    def bytes_for(self, pages, overhead):
+        """I2C bytes to send these pages (`overhead` per page for window + control)."""
+        total = 0
+        for p in pages:
+            total += overhead + self.hi[p] - self.lo[p]
+        return total
+
+    def take(self, page):
+        """(lo, hi) columns to send for `page`; the page is clean afterwards."""
+        lo = self.lo[page]
+        hi = self.hi[page]
+        self.hi[page] = 0
+        return lo, hi
+
+
+class DisplayManager:
+    """Dirty-checked, batched text output on top of a backend's labels."""
+
+    def __init__(self, hw, shown=None):
+        self.hw = hw
+        # text currently on each label (`shown`: what the caller already put there)
+        self.shown = list(shown) if shown is not None else [""] * LINES
+        self.dirty = False
+
+        # Counters
+        self.requests = 0             # show() calls
+        self.label_updates = 0        # labels actually re-laid out
+        self.labels_skipped = 0       # label writes avoided (same text)
+        self.refreshes = 0
+        self.bytes_sent = 0           # I2C bytes for the refreshes (backend estimate)
+
+    def show(self, l1="", l2="", l3="", l4=""):
+        """Request these four lines. Nothing is sent until refresh()."""
+        self.requests += 1
+        self._set(0, l1)
+        self._set(1, l2)
+        self._set(2, l3)
+        self._set(3, l4)
+
+    def _set(self, index, text):
+        if self.shown[index] == text:
+            self.labels_skipped += 1
+            return
+        self.shown[index] = text
+        self.hw.set_line(index, text)
+        self.label_updates += 1
+        self.dirty = True
+
+    def refresh(self):
+        """Push pending changes to the OLED. Returns True if anything was sent."""
+        if not self.dirty:
+            return False
+        self.dirty = False
+        self.refreshes += 1
+        self.bytes_sent += self.hw.refresh()
+        return True
+
+    def redraws_avoided(self):
+        """show() calls that did not need a refresh of their own."""
+        return self.requests - self.refreshes
+
+    def prerender(self, row, text):
+        """Build a row ahead of time so showing it later is a pointer swap."""
+        self.hw.prerender(row, text)
+
+    def report(self):
+        text = "display: {} requests, {} refreshes ({} avoided), {} labels skipped, {} bytes".format(
+            self.requests, self.refreshes, self.redraws_avoided(),
+            self.labels_skipped, self.bytes_sent)
+        if self.hw.row_cache is not None:
+            text += "\n" + self.hw.row_cache.report()
+        return text
@@ -0,0 +1,555 @@
+import heapq
+import importlib.util
+import os
+import random
+import sys
+import time
+
+import replay
+from i2cbus import BusArbiter, transfer_time
+from adxl345 import FIFO_SIZE, SCALE as ACCEL_SCALE
+from screen import FRAME_BYTES, PAGE_OVERHEAD, DirtyPages, LruCache
+
+# =========================
+#  Host simulator backend
+# =========================
+#
+# Pure-Python stand-in for hardware.HardwareBackend (same methods), used
+# to run, profile and load-test the game on a Linux box. Host only: it
+# uses importlib, which CircuitPython does not have.
+#
+#   python3 simulator.py [games] [seed] [--profile] [--record FILE]
+#   python3 simulator.py --replay FILE
+
+# Quadrature states in clockwise order (matches transition_table in code.py)
+CW_SEQUENCE = (0b00, 0b01, 0b11, 0b10)
+
+GRAVITY = 9.81
+
+# Contact bounce: a pin changed with `bounce` > 0 toggles this many times
+# before it settles
+BOUNCE_EDGES = 4
+
+
+class SimBackend:
+    """
+    Simulated encoder, buttons, ADXL345, OLED and NeoPixel on a virtual clock.
+
+    Every monotonic() call costs `loop_cost` virtual seconds (the price of
+    one pass through the loop). The scheduler's idle hook jumps the clock
+    straight to the next due task or scripted input, so idle waits cost
+    nothing and a whole game runs thousands of times faster than real time.
+    """
+
+    def __init__(self, seed=None, loop_cost=0.00005, noise=0.05, int_pin=False,
+                 page_chunks=True):
+        self.now = 0.0
+        self.loop_cost = loop_cost
+        self.noise = noise
+        self.rng = random.Random(seed)
+
+        # Scripted input changes: heap of (time, seq, fn, arg)
+        self._events = []
+        self._seq = 0
+        self._changed = False     # an input changed since the last idle()
+
+        # Input state
+        self.enc_phase = 0        # position in CW_SEQUENCE (any integer)
+        self.enc_sw = True        # True = released
+        self.button = True        # True = released
+        self.tilt_x = 0.0         # m/s^2 added to X (left tilt = positive)
+        self.grip = 0.0           # X at rest: how the player holds the device
+        self._tilts = 0           # so an old tilt's release can't undo a new one
+
+        # Output state
+        self.lines = ["", "", "", ""]
+        self.pixel = (0, 0, 0)
+        self.on_refresh = None    # called with the lines once a frame is on the OLED
+
+        # Shared I2C bus: transfers take virtual time at the bus clock.
+        # page_chunks=True models the page driver, False one displayio frame.
+        self.bus = BusArbiter(self.monotonic)
+        self.bus.send = self._send_page
+        self.bus.on_frame.append(self._frame_shown)
+        self.page_chunks = page_chunks
+        self.dirty = DirtyPages()
+        # Same bookkeeping as the device: rows are cached as displayio labels only
+        self.row_cache = None if page_chunks else LruCache(32)
+        self.saved_baseline = None      # raw counts, see save_baseline()
+
+        # ADXL345 FIFO (stream mode): sample rate and time of the next sample
+        self.fifo_rate = None
+        self._fifo_next = 0.0
+
+        # ADXL345 activity interrupt; int_pin=True models a wired INT1 line
+        # (checking it is free), False means polling INT_SOURCE over I2C.
+        self.int_pin = int_pin
+        self.act_threshold = None
+        self.int_line = False
+
+        # Staged startup, like HardwareBackend: the OLED works from the
+        # start, the rest "comes up" through start_next() (nothing to do here)
+        self.stages = ["accel", "encoder", "buttons", "pixel"]
+
+        # Counters
+        self.accel_samples = 0
+        self.accel_reads = 0        # I2C register reads
+        self.accel_sessions = 0     # times the bus was taken
+        self.refreshes = 0
+        self.pixel_writes = 0
+
+    # --- clock ---
+
+    def monotonic(self):
+        t = self.now
+        self.now += self.loop_cost
+        return t
+
+    def monotonic_ns(self):
+        return int(self.monotonic() * 1000000000)
+
+    def start_next(self):
+        """Start the next device. Returns its name, None when all are up."""
+        if not self.stages:
+            return None
+        return self.stages.pop(0)
+
+    def idle(self, until):
+        """
+        Scheduler idle hook: skip ahead to `until` or the next input event.
+        Right after an input change we don't skip, so the game polls the
+        new state at least twice (like the real, busy-polling loop does).
+        """
+        if self._changed:
+            self._changed = False
+            return
+        if until is None or self.bus.pending:
+            return
+        if self._events and self._events[0][0] < until:
+            until = self._events[0][0]
+        if until > self.now:
+            self.now = until
+
+    # --- scripting ---
+
+    def at(self, t, fn, arg=None):
+        """Call fn(arg) when the virtual clock reaches t."""
+        self._seq += 1
+        heapq.heappush(self._events, (t, self._seq, fn, arg))
+
+    def _apply_events(self):
+        events = self._events
+        while events and events[0][0] <= self.now:
+            _, _, fn, arg = heapq.heappop(events)
+            fn(arg)
+            self._changed = True
+
+    def _step_encoder(self, step):
+        self.enc_phase += step
+
+    def _set_enc_sw(self, value):
+        self.enc_sw = value
+
+    def _set_button(self, value):
+        self.button = value
+
+    def _set_tilt(self, value):
+        self.tilt_x = value
+        self._check_activity()
+
+    def _release_tilt(self, tilt_id):
+        if tilt_id == self._tilts:
+            self._set_tilt(0.0)
+
+    def _check_activity(self):
+        # The sensor compares every sample; tilt only changes on events
+        if self.act_threshold is not None and abs(self.grip + self.tilt_x) > self.act_threshold:
+            self.int_line = True
+
+    def turn(self, t, direction, steps=2, step_time=0.002):
+        """Rotate by `steps` quadrature edges; direction +1 = CW, -1 = CCW."""
+        for i in range(steps):
+            self.at(t + i * step_time, self._step_encoder, direction)
+
+    def _pin_edge(self, t, setter, value, bounce):
+        """Set a pin at t; with `bounce` > 0 it chatters for that long first."""
+        if bounce:
+            for i in range(BOUNCE_EDGES):
+                self.at(t + bounce * i / BOUNCE_EDGES, setter, value if i % 2 == 0 else not value)
+        self.at(t + bounce, setter, value)
+
+    def press_encoder(self, t, duration=0.08, bounce=0.0):
+        self._pin_edge(t, self._set_enc_sw, False, bounce)
+        self._pin_edge(t + duration, self._set_enc_sw, True, bounce)
+
+    def press_button(self, t, duration=0.08, bounce=0.0):
+        self._pin_edge(t, self._set_button, False, bounce)
+        self._pin_edge(t + duration, self._set_button, True, bounce)
+
+    def _set_grip(self, value):
+        self.grip = value
+        self._check_activity()
+
+    def shift_grip(self, t, x):
+        """From t on the device rests at X = x m/s^2 (a new grip)."""
+        self.at(t, self._set_grip, x)
+
+    def tilt(self, t, dx, duration=0.5):
+        """Tilt so X reads `dx` m/s^2 off level, then return to level."""
+        self._tilts += 1
+        self.at(t, self._set_tilt, dx)
+        self.at(t + duration, self._release_tilt, self._tilts)
+
+    def random_inputs(self, t, duration, rate=20.0):
+        """Schedule random turns, clicks and tilts (about `rate` per second)."""
+        end = t + duration
+        while True:
+            t += self.rng.expovariate(rate)
+            if t >= end:
+                return
+            kind = self.rng.randrange(4)
+            if kind == 0:
+                self.turn(t, self.rng.choice((1, -1)))
+            elif kind == 1:
+                self.press_encoder(t, self.rng.uniform(0.02, 0.15))
+            elif kind == 2:
+                self.press_button(t, self.rng.uniform(0.02, 0.15))
+            else:
+                self.tilt(t, self.rng.uniform(-5.0, 5.0), self.rng.uniform(0.05, 0.4))
+
+    # --- inputs (same methods as HardwareBackend) ---
+
+    def encoder_position(self):
+        # Models the hardware counter: every edge counts, however fast
+        self._apply_events()
+        return self.enc_phase
+
+    def encoder_state(self):
+        """AB pin levels, (a << 1) | b, for code that decodes edges itself."""
+        self._apply_events()
+        return CW_SEQUENCE[self.enc_phase % 4]
+
+    def encoder_switch(self):
+        self._apply_events()
+        return self.enc_sw
+
+    def button_value(self):
+        self._apply_events()
+        return self.button
+
+    def _sample(self):
+        gauss = self.rng.gauss
+        return (self.grip + self.tilt_x + gauss(0.0, self.noise),
+                gauss(0.0, self.noise),
+                GRAVITY + gauss(0.0, self.noise))
+
+    def _bus_time(self, nbytes, sensor=False):
+        """Hold the bus for an nbytes transaction."""
+        start = self.now
+        self.now += transfer_time(nbytes, self.bus.frequency)
+        self.bus.hold(start, self.now, sensor)
+
+    def acceleration(self):
+        self._apply_events()
+        self._bus_time(8, sensor=True)   # register address + 6 data bytes
+        self.accel_samples += 1
+        self.accel_reads += 1
+        self.accel_sessions += 1
+        return self._sample()
+
+    def acceleration_x(self):
+        self._apply_events()
+        self._bus_time(4, sensor=True)   # register address + DATAX0..1
+        self.accel_samples += 1
+        self.accel_reads += 1
+        self.accel_sessions += 1
+        return self.grip + self.tilt_x + self.rng.gauss(0.0, self.noise)
+
+    def accel_stream(self, enable, rate=100):
+        if enable:
+            self.fifo_rate = rate
+            self._fifo_next = self.now
+        else:
+            self.fifo_rate = None
+
+    def accel_fifo_clear(self):
+        self.accel_sessions += 2        # FIFO_CTL bypass, then stream again
+        self._bus_time(6, sensor=True)
+        self._fifo_next = self.now
+
+    def accel_fifo_into(self, out):
+        """
+        Samples produced at fifo_rate since the last drain, as raw counts.
+        Like the real FIFO only the newest FIFO_SIZE samples survive.
+        """
+        self._apply_events()
+        period = 1.0 / self.fifo_rate
+        if self.now < self._fifo_next:
+            n = 0
+        else:
+            backlog = int((self.now - self._fifo_next) / period) + 1
+            if backlog > FIFO_SIZE:
+                self._fifo_next += (backlog - FIFO_SIZE) * period
+                backlog = FIFO_SIZE
+            n = min(backlog, len(out) // 3)
+            j = 0
+            for _ in range(n):
+                for v in self._sample():
+                    out[j] = int(round(v / ACCEL_SCALE))
+                    j += 1
+            self._fifo_next += n * period
+        self.accel_samples += n
+        self.accel_reads += n + 1   # FIFO_STATUS + one read per entry
+        self.accel_sessions += 1
+        self._bus_time(3 + 8 * n, sensor=True)
+        return n
+
+    def accel_activity_arm(self, threshold):
+        self.act_threshold = threshold
+        self.int_line = False
+        self._check_activity()
+
+    def accel_activity_disarm(self):
+        self.act_threshold = None
+        self.int_line = False
+
+    def accel_activity(self):
+        self._apply_events()
+        if not self.int_pin:
+            self.accel_reads += 1       # INT_SOURCE read
+            self.accel_sessions += 1
+            self._bus_time(3, sensor=True)
+        elif not self.int_line:
+            return False
+        fired = self.int_line
+        self.int_line = False           # reading INT_SOURCE clears it
+        return fired
+
+    def accel_bus_stats(self):
+        return self.accel_samples, self.accel_reads, self.accel_sessions
+
+    # --- saved calibration (NVM on the device, kept for the session here) ---
+
+    def load_baseline(self):
+        return self.saved_baseline
+
+    def save_baseline(self, counts):
+        self.saved_baseline = counts
+
+    # --- outputs ---
+
+    def set_pixel(self, color):
+        self.pixel = color
+        self.pixel_writes += 1
+
+    def prerender(self, row, text):
+        if self.row_cache is not None and (row, text) not in self.row_cache.items:
+            self.row_cache.put((row, text), text, pin=True)
+
+    def set_line(self, index, text):
+        if self.row_cache is not None and self.row_cache.get((index, text)) is None:
+            self.row_cache.put((index, text), text)
+        self.lines[index] = text
+        self.dirty.mark_row(index, text)
+
+    # The arbiter accounts display transfers itself; these only take the time
+
+    def _send_page(self, page):
+        lo, hi = self.dirty.take(page)
+        nbytes = PAGE_OVERHEAD + hi - lo
+        self.now += transfer_time(nbytes, self.bus.frequency)
+        return nbytes
+
+    def _send_frame(self):
+        self.now += transfer_time(FRAME_BYTES + 1, self.bus.frequency)
+
+    def _frame_shown(self):
+        if self.on_refresh is not None:
+            self.on_refresh(self.lines)
+
+    def refresh(self):
+        self.refreshes += 1
+        if self.page_chunks:
+            pages = self.dirty.pages()
+            self.bus.start_frame(pages)
+            return self.dirty.bytes_for(pages, PAGE_OVERHEAD)
+        self.bus.transfer(self._send_frame)
+        return FRAME_BYTES
+
+
+class SimPlayer:
+    """
+    Scripted player: watches the simulated OLED and answers every prompt
+    after a random reaction time. With accuracy < 1 some prompts are
+    ignored, which costs a life; a `wrong` fraction of those gets a
+    different move instead. With probability `twitch` the hand jerks
+    once during "HOLD STILL". With `grip` > 0 the player's hold wanders
+    from level to level: X at rest moves by up to +/- grip each time.
+    """
+
+    def __init__(self, backend, move_labels, difficulty="EASY",
+                 reaction=(0.25, 0.6), accuracy=1.0, wrong=0.0, twitch=0.0, grip=0.0):
+        self.backend = backend
+        self.moves_by_label = {text: move for move, text in move_labels.items()}
+        self.difficulty = difficulty
+        self.reaction = reaction
+        self.accuracy = accuracy
+        self.wrong = wrong
+        self.twitch = twitch
+        self.grip = grip
+        self.last_screen = None
+        self.moves_done = 0
+        backend.on_refresh = self.on_screen
+
+    def on_screen(self, lines):
+        screen = tuple(lines)
+        if screen == self.last_screen:
+            return
+        self.last_screen = screen
+
+        hw = self.backend
+        t = hw.now + hw.rng.uniform(*self.reaction)
+        if lines[0] == "SELECT MODE":
+            if lines[1] == "> " + self.difficulty:
+                hw.press_encoder(t)
+            else:
+                hw.turn(t, 1)
+        elif lines[1].startswith("> PLAY"):
+            hw.press_encoder(t)
+        elif lines[0].startswith("LEVEL "):
+            if self.grip:
+                hw.shift_grip(hw.now + hw.rng.uniform(0.0, 0.5),
+                              hw.grip + hw.rng.uniform(-self.grip, self.grip))
+        elif lines[0] == "HOLD STILL":
+            if self.twitch and hw.rng.random() < self.twitch:
+                hw.tilt(hw.now + hw.rng.uniform(0.0, 0.1), hw.rng.uniform(-3.0, 3.0),
+                        hw.rng.uniform(0.02, 0.06))
+        elif lines[1].startswith("DO: "):
+            move = self.moves_by_label[lines[1][4:]]
+            if hw.rng.random() >= self.accuracy:
+                if hw.rng.random() >= self.wrong:
+                    return
+                others = [m for m in self.moves_by_label.values() if m != move]
+                move = hw.rng.choice(others)
+            hw.at(t, self._answer, (screen, move))
+
+    def _answer(self, arg):
+        # Like a person, don't answer a prompt that is gone already (the
+        # game took a tilt still held from the move before as this one)
+        screen, move = arg
+        if screen == self.last_screen:
+            self.do_move(move, self.backend.now)
+
+    def do_move(self, move, t):
+        hw = self.backend
+        self.moves_done += 1
+        if move == "TURN_CW":
+            hw.turn(t, 1)
+        elif move == "TURN_CCW":
+            hw.turn(t, -1)
+        elif move == "PUSH_BTN":
+            hw.press_button(t)
+        elif move == "PUSH_ENC":
+            hw.press_encoder(t)
+        elif move == "TILT_LEFT":
+            hw.tilt(t, 4.0)
+        elif move == "TILT_RIGHT":
+            hw.tilt(t, -4.0)
+
+
+def load_game(backend, profile=False, replay=None, record=False):
+    """
+    Import src/code.py as module "game" with `backend` as its hardware,
+    and run its staged startup to the end. (Loaded by path because
+    "code" is also a standard library module.)
+    profile=True turns on code.py's section profiler, record=True its
+    game recorder; `replay` is the path of a recorded game to take the
+    inputs from.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    spec = importlib.util.spec_from_file_location("game", os.path.join(here, "code.py"))
+    game = importlib.util.module_from_spec(spec)
+    game.hw = backend
+    game.PROFILE = profile
+    game.REPLAY = replay
+    game.RECORD = record
+    spec.loader.exec_module(game)
+    game.finish_boot()   # all devices up, as after the opening screen
+    return game
+
+
+def run_games(games=10, seed=0, difficulty="EASY", accuracy=0.97, wrong=0.5, twitch=0.3,
+              grip=0.3, accel_stream=True, profile=False, page_chunks=True, record=None):
+    """
+    Play `games` full games against SimPlayer. Returns (wins, virtual s, wall s).
+    With `record` set the last game is saved there (see replay.py).
+    """
+    random.seed(seed)
+    hw = SimBackend(seed=seed, page_chunks=page_chunks)
+    game = load_game(hw, profile, record=record is not None)
+    game.set_accel_stream(accel_stream)
+    game.prerender_screens()
+    SimPlayer(hw, game.MOVE_LABELS, difficulty=difficulty, accuracy=accuracy, wrong=wrong,
+              twitch=twitch, grip=grip)
+
+    wins = 0
+    wall_start = time.perf_counter()
+    for _ in range(games):
+        result = game.play_game()
+        game.recorder.add(replay.END, int(result))
+        if result:
+            wins += 1
+    wall = time.perf_counter() - wall_start
+    if record is not None:
+        game.recorder.save(record)
+        print(game.recorder.report() + " -> " + record)
+    game.print_accel_stats()   # covers the last game
+    print(game.boot.report())
+    print(game.display.report())
+    print(game.leds.report())
+    print(hw.bus.report())
+    print(game.memory.report())
+    print(game.input_events.report())
+    print(game.calibrator.report())
+    print(game.drift.report())
+    print(game.telemetry.report())
+    if profile:
+        print(game.profiler.report())
+    return wins, hw.now, wall
+
+
+def replay_game(path, seed=0, profile=False):
+    """Play a recorded game again. Returns True if it ended the same way."""
+    hw = SimBackend(seed=seed)
+    game = load_game(hw, profile, replay=path)
+    return game.replay_game()
+
+
+def option(args, name):
+    """Remove `name VALUE` from args and return VALUE (None if absent)."""
+    if name not in args:
+        return None
+    i = args.index(name)
+    value = args[i + 1]
+    del args[i:i + 2]
+    return value
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    record = option(args, "--record")
+    replay_path = option(args, "--replay")
+    profile = "--profile" in args
+    args = [a for a in args if a != "--profile"]
+    if replay_path is not None:
+        sys.exit(0 if replay_game(replay_path, profile=profile) else 1)
+    n = int(args[0]) if len(args) > 0 else 10
+    s = int(args[1]) if len(args) > 1 else 0
+    for stream in (False, True):
+        wins, virtual, wall = run_games(n, s, accel_stream=stream, profile=profile,
+                                        record=record)
+        print("games: {}  wins: {}".format(n, wins))
+        print("virtual time: {:.1f} s  wall time: {:.2f} s  speed-up: {:.0f}x".format(
+            virtual, wall, virtual / wall))
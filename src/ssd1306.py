@@ -0,0 +1,132 @@
+from adafruit_bus_device.i2c_device import I2CDevice
+
+from screen import CHAR_WIDTH, PAGES, ROW_PAGES, WIDTH
+
+# =========================
+#  SSD1306 page driver (device only)
+# =========================
+#
+# Drives the 128x64 OLED directly instead of through displayio, so a
+# frame can go out one 128-byte page at a time (see i2cbus.BusArbiter).
+# The framebuffer is in SSD1306 page format: byte (page * STRIDE + 1 + x)
+# holds pixels x, page*8 .. page*8+7, LSB on top. Each page is preceded
+# by one spare byte for the 0x40 data control byte, so a page (or any
+# column range of it) is written to the bus straight from the
+# framebuffer, without copying it into a send buffer first.
+#
+# Text is drawn from terminalio.FONT (6x12 glyphs). A text row is 16 px
+# high, i.e. two pages, like the old labels at y = 0, 16, 32, 48.
+# Glyph columns are blitted through a memoryview directly into the
+# framebuffer, only for the character cells that changed.
+
+ADDRESS = 0x3C
+HEIGHT = PAGES * 8
+ROW_CHARS = WIDTH // CHAR_WIDTH
+STRIDE = WIDTH + 1       # control byte + one page of columns
+DATA = 0x40              # control byte: the bytes after it are pixel data
+
+# Power-up sequence for a 128x64 module with the charge pump on
+INIT = (
+    0xAE,           # display off
+    0xD5, 0x80,     # clock divide
+    0xA8, 0x3F,     # multiplex 64
+    0xD3, 0x00,     # display offset
+    0x40,           # start line 0
+    0x8D, 0x14,     # charge pump on
+    0x20, 0x00,     # horizontal addressing
+    0xA1,           # segment remap (column 127 = SEG0)
+    0xC8,           # COM scan descending
+    0xDA, 0x12,     # COM pins
+    0x81, 0xCF,     # contrast
+    0xD9, 0xF1,     # precharge
+    0xDB, 0x40,     # VCOM detect
+    0xA4,           # follow RAM
+    0xA6,           # normal (not inverted)
+    0xAF,           # display on
+)
+
+
+class Ssd1306:
+    """Framebuffer plus page writes with column/page addressing."""
+
+    def __init__(self, i2c, font, address=ADDRESS):
+        self.device = I2CDevice(i2c, address)
+        self.font = font
+        self.buffer = bytearray(STRIDE * PAGES)
+        for page in range(PAGES):
+            self.buffer[page * STRIDE] = DATA
+        self.view = memoryview(self.buffer)
+        self.window = bytearray((0x00, 0x21, 0, WIDTH - 1, 0x22, 0, 0))
+        self.glyphs = {}                      # char -> (top, bottom) 6-column memoryviews
+        cmd = bytearray(2)
+        with self.device as dev:
+            for c in INIT:
+                cmd[1] = c
+                dev.write(cmd)
+
+    def send_page(self, page, lo=0, hi=WIDTH):
+        """
+        Write columns lo .. hi-1 of one page, using a column/page address
+        window so the rest of the panel is left alone. Returns the bytes sent.
+        The control byte goes in the byte just before column lo (the
+        spare byte for lo = 0, else column lo-1, put back afterwards).
+        """
+        n = hi - lo
+        if n <= 0:
+            return 0
+        window = self.window
+        window[2] = lo
+        window[3] = hi - 1
+        window[5] = page
+        window[6] = page
+        buffer = self.buffer
+        start = page * STRIDE + lo
+        saved = buffer[start]
+        buffer[start] = DATA
+        with self.device as dev:
+            dev.write(window)
+            dev.write(buffer, start=start, end=start + n + 1)
+        buffer[start] = saved
+        return len(window) + n + 1
+
+    def _glyph(self, ch):
+        """Columns of one character: (top page, bottom page), 6 bytes each."""
+        halves = self.glyphs.get(ch)
+        if halves is not None:
+            return halves
+        cols = bytearray(2 * CHAR_WIDTH)
+        glyph = self.font.get_glyph(ord(ch))
+        if glyph is not None:
+            bitmap = glyph.bitmap
+            x0 = glyph.tile_index * glyph.width
+            for x in range(min(glyph.width, CHAR_WIDTH)):
+                for y in range(glyph.height):
+                    if bitmap[x0 + x, y]:
+                        cols[(y >> 3) * CHAR_WIDTH + x] |= 1 << (y & 7)
+        view = memoryview(bytes(cols))
+        halves = (view[:CHAR_WIDTH], view[CHAR_WIDTH:])
+        self.glyphs[ch] = halves
+        return halves
+
+    def prepare(self, text):
+        """Build the glyphs of `text` now rather than when it is first drawn."""
+        for ch in text[:ROW_CHARS]:
+            self._glyph(ch)
+
+    def draw_row(self, row, text, lo=0, hi=WIDTH):
+        """
+        Draw the character cells of text row `row` that cover columns
+        lo .. hi-1 straight into the framebuffer; cells past the end of
+        `text` are cleared.
+        """
+        view = self.view
+        top = row * ROW_PAGES * STRIDE + 1     # column 0 of the row's top page
+        bottom = top + STRIDE
+        n = len(text)
+        blank = self._glyph(" ")
+        end = min((hi + CHAR_WIDTH - 1) // CHAR_WIDTH, ROW_CHARS)
+        for cell in range(lo // CHAR_WIDTH, end):
+            upper, lower = self._glyph(text[cell]) if cell < n else blank
+            x = cell * CHAR_WIDTH
+            view[top + x:top + x + CHAR_WIDTH] = upper
+            view[bottom + x:bottom + x + CHAR_WIDTH] = lower
@@ -0,0 +1,164 @@
+import array
+
+# =========================
+#  Reaction-time and latency telemetry
+# =========================
+#
+# All timestamps come from the backend's monotonic_ns(), so nothing is
+# lost to float rounding after hours of uptime. Results are kept in
+# microseconds in fixed-size ring buffers (no allocation per move);
+# sorting for the percentiles only happens when a summary is asked for.
+
+
+class RingBuffer:
+    """The last `size` integer samples, in a preallocated array."""
+
+    def __init__(self, size=64):
+        self.data = array.array("l", [0] * size)
+        self.size = size
+        self.index = 0       # where the next sample goes
+        self.count = 0       # samples ever added
+
+    def add(self, value):
+        self.data[self.index] = value
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+        self.count += 1
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+    def summary(self):
+        """(p50, p95, max) of the samples held, or None when empty."""
+        n = min(self.count, self.size)
+        if n == 0:
+            return None
+        values = sorted(self.data[:n])
+        return (values[(n - 1) // 2], values[(95 * n - 1) // 100], values[-1])
+
+
+class MoveTelemetry:
+    """
+    Per-move timing, in microseconds:
+      react - prompt on the OLED -> move detected (the player's reaction time)
+      draw  - prompt requested -> OLED refresh finished
+      stale - input seen by the poll task -> move detected by the game
+      loop  - longest loop iteration while waiting (worst-case polling jitter)
+    and the X baseline drift (tracked - calibrated) in mm/s^2 at each prompt.
+    """
+
+    NAMES = ("react", "draw", "stale", "loop")
+
+    def __init__(self, size=64):
+        self.buffers = {}
+        for name in self.NAMES:
+            self.buffers[name] = RingBuffer(size)
+        self.misses = 0
+        self.wrong = 0                # of the misses, ended by a wrong move
+        self.shown_ns = 0
+        self.drawn_ns = 0
+        self.drawing = False          # prompt requested, frame not out yet
+        self.last_loop_ns = 0
+        self.max_loop_ns = 0
+        self.drift = RingBuffer(size)   # |baseline drift| per move, mm/s^2
+        self.last_drift = 0
+
+    def reset(self):
+        for name in self.NAMES:
+            self.buffers[name].clear()
+        self.drift.clear()
+        self.last_drift = 0
+        self.misses = 0
+        self.wrong = 0
+
+    def move_shown(self, shown_ns):
+        """The prompt was requested at shown_ns (frame_drawn() follows)."""
+        self.shown_ns = shown_ns
+        self.drawn_ns = shown_ns
+        self.drawing = True
+        self.last_loop_ns = shown_ns
+        self.max_loop_ns = 0
+
+    def frame_drawn(self, drawn_ns):
+        """A frame finished; the first one after move_shown() holds the prompt."""
+        if not self.drawing:
+            return
+        self.drawing = False
+        self.drawn_ns = drawn_ns
+        self.buffers["draw"].add((drawn_ns - self.shown_ns) // 1000)
+
+    def loop(self, now_ns):
+        """Called once per wait-loop iteration."""
+        gap = now_ns - self.last_loop_ns
+        if gap > self.max_loop_ns:
+            self.max_loop_ns = gap
+        self.last_loop_ns = now_ns
+
+    def move_done(self, detect_ns, input_ns):
+        """The move was detected at detect_ns; its input was first seen at input_ns."""
+        self.buffers["react"].add((detect_ns - self.drawn_ns) // 1000)
+        if input_ns >= self.drawn_ns:
+            self.buffers["stale"].add((detect_ns - input_ns) // 1000)
+        self.buffers["loop"].add(self.max_loop_ns // 1000)
+
+    def move_missed(self):
+        self.misses += 1
+        self.buffers["loop"].add(self.max_loop_ns // 1000)
+
+    def move_wrong(self):
+        """Missed because a different move was made."""
+        self.wrong += 1
+        self.move_missed()
+
+    def baseline_drift(self, drift):
+        """Tracked minus calibrated X baseline (m/s^2) when a move is shown."""
+        self.last_drift = int(drift * 1000)
+        self.drift.add(abs(self.last_drift))
+
+    def summary(self, name):
+        """(p50, p95, max) in microseconds, or None."""
+        return self.buffers[name].summary()
+
+    def report(self):
+        lines = ["timing (us)      p50      p95      max"]
+        for name in self.NAMES:
+            s = self.summary(name)
+            if s is None:
+                lines.append("{:<8}       -".format(name))
+            else:
+                lines.append("{:<8} {:>8} {:>8} {:>8}".format(name, s[0], s[1], s[2]))
+        s = self.drift.summary()
+        if s is not None:
+            lines.append("drift (mm/s^2) {:>4} {:>8} {:>8}   last {:+d}".format(
+                s[0], s[1], s[2], self.last_drift))
+        lines.append("moves: {}  missed: {} ({} wrong move)".format(
+            self.buffers["react"].count, self.misses, self.wrong))
+        return "\n".join(lines)
+
+
+class BootTimeline:
+    """
+    Named startup timestamps (ns from `clock`), reported in ms since
+    `start_ns` (code.py takes it before its first import). "first_frame"
+    is the time to the first frame on the OLED.
+    """
+
+    def __init__(self, clock, start_ns=None):
+        self.clock = clock
+        self.start_ns = clock() if start_ns is None else start_ns
+        self.marks = []       # (name, ns), in order
+
+    def mark(self, name, ns=None):
+        """Mark `name` now, or at `ns` if it was taken before the timeline existed."""
+        self.marks.append((name, self.clock() if ns is None else ns))
+
+    def report(self):
+        lines = ["boot (ms)     at     step"]
+        last = self.start_ns
+        for name, ns in self.marks:
+            lines.append("{:<11} {:>6.1f} {:>8.1f}".format(
+                name, (ns - self.start_ns) / 1000000, (ns - last) / 1000000))
+            last = ns
+        return "\n".join(lines)
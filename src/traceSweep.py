@@ -0,0 +1,245 @@
+import sys
+
+import numpy as np
+
+import replay
+from events import NAMES as MOVES   # code.py's MOVES: PROMPT records hold the index
+
+# ---------------------------
+# Offline tuning of alpha, TILT_TH and STEPS_PER_TURN on recorded games.
+# Host only (needs NumPy):  python3 traceSweep.py game.rec [game2.rec ...]
+# Recordings come from the device (code.py with RECORD on saves
+# /last_game.rec) or the simulator (python3 simulator.py 10 0 --record
+# game.rec).
+#
+# Every move window (prompt -> move detected or timed out) of every file
+# is run through every parameter set at once. Per set:
+#   detected - the expected tilt / turn, at least REACTION_MIN_MS after the prompt
+#   missed   - never detected (false negatives)
+#   early    - detected faster than anyone reacts: the previous move still
+#              held, or noise. The game would accept it (false positives)
+#   wrong    - a tilt / turn the other way first. With FAIL_FAST one made
+#              REACTION_MIN_MS or more after the prompt ends the attempt (a
+#              lost life); without it the game ignores them. Counted here
+#              at any time: they show how close noise and wobble get
+#              to triggering
+# A window ends where the recorded game moved on, and with ACCEL_WAKE
+# only the samples after the activity interrupt are recorded: settings
+# slower than the recorded ones can only show up as misses, so record
+# with the loosest settings you want to compare.
+# The filter runs in float here; the device filters stream-mode samples
+# in fixed point (accel.LowPassFilter), which differs by < 1 count.
+# ---------------------------
+
+REACTION_MIN_MS = 100.0
+
+# The current settings in code.py, marked with * in the tables
+ALPHA = 0.2
+TILT_TH = 2.0
+STEPS_PER_TURN = 2
+
+ALPHAS = np.array([0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.7, 1.0])
+THRESHOLDS = np.array([1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0])
+STEPS = np.array([1, 2, 3, 4])
+TOP = 10   # rows per table (the current settings are always shown)
+
+
+class Window:
+    """One move: expected move, and the x samples / encoder steps while it was shown."""
+
+    def __init__(self, move, t0, baseline):
+        self.move = move
+        self.t0 = t0               # prompt time, us
+        self.baseline = baseline   # x at the prompt (calibrated + drift), m/s^2
+        self.accel_t = []          # ms since the prompt
+        self.x = []                # m/s^2
+        self.enc_t = []
+        self.enc = []              # position changes (edges)
+        self.end = None            # ms since the prompt
+        self.detected = False      # by the recorded game
+
+
+def split(recording):
+    """The move windows of one recording."""
+    scale = recording.scale
+    windows = []
+    window = None
+    for t_us, kind, a, b, c in recording.records:
+        if kind == replay.PROMPT:
+            window = Window(MOVES[a], t_us, b * scale)   # b: baseline, drift tracked
+            windows.append(window)
+        elif kind == replay.DONE:
+            if window is not None:
+                window.end = (t_us - window.t0) / 1000
+                window.detected = a == 1   # 2: ended by a wrong move
+            window = None
+        elif kind == replay.ACCEL and window is not None:
+            window.accel_t.append((t_us - window.t0) / 1000)
+            window.x.append(a * scale)
+        elif kind == replay.ENC and window is not None:
+            window.enc_t.append((t_us - window.t0) / 1000)
+            window.enc.append(a)
+    return [w for w in windows if w.end is not None]
+
+
+def pad(rows, fill=0.0):
+    """Ragged lists -> (len(rows), longest) array plus a mask of the real entries."""
+    n = max([len(r) for r in rows] + [1])
+    out = np.full((len(rows), n), fill)
+    mask = np.zeros((len(rows), n), dtype=bool)
+    for i, r in enumerate(rows):
+        out[i, :len(r)] = r
+        mask[i, :len(r)] = True
+    return out, mask
+
+
+def first_true(hits):
+    """Index of the first True along the last axis, and whether there is one."""
+    return hits.argmax(axis=-1), hits.any(axis=-1)
+
+
+def percentiles(latency, found):
+    """p50 / p95 over the windows (last axis) where found, for each leading index."""
+    shape = latency.shape[:-1]
+    p50 = np.full(shape, np.nan)
+    p95 = np.full(shape, np.nan)
+    for idx in np.ndindex(shape):
+        values = latency[idx][found[idx]]
+        if values.size:
+            p50[idx] = np.percentile(values, 50)
+            p95[idx] = np.percentile(values, 95)
+    return p50, p95
+
+
+def sweep_tilt(windows):
+    """
+    Detection of TILT_LEFT / TILT_RIGHT for every (alpha, threshold).
+    Returns rows (alpha, threshold, detected, missed, early, wrong, p50, p95)
+    and the number of tilt windows.
+    """
+    windows = [w for w in windows if w.move in ("TILT_LEFT", "TILT_RIGHT")]
+    if not windows:
+        return [], 0
+    x, valid = pad([w.x for w in windows])
+    t, _ = pad([w.accel_t for w in windows], np.inf)
+    baseline = np.array([w.baseline for w in windows])
+    sign = np.array([1.0 if w.move == "TILT_LEFT" else -1.0 for w in windows])  # x rises on a left tilt
+
+    # Low-pass filter for all alphas and windows at once, restarted from the
+    # baseline at the prompt (reset_accel_filter): shape (alphas, windows, samples)
+    a = ALPHAS[:, None]
+    f = np.repeat(baseline[None, :], len(ALPHAS), axis=0)
+    filtered = np.empty((len(ALPHAS),) + x.shape)
+    for i in range(x.shape[1]):
+        f = np.where(valid[None, :, i], f + a * (x[None, :, i] - f), f)
+        filtered[:, :, i] = f
+    toward = (filtered - baseline[None, :, None]) * sign[None, :, None]
+
+    # Crossings for every threshold: shape (alphas, thresholds, windows, samples)
+    th = THRESHOLDS[None, :, None, None]
+    right = (toward[:, None] > th) & valid
+    wrong = (toward[:, None] < -th) & valid
+    hit, found = first_true(right)
+    latency = t[np.arange(len(windows)), hit]
+    return rates(ALPHAS, THRESHOLDS, found, latency, wrong, hit)
+
+
+def rates(first, second, found, latency, wrong, hit):
+    """Table rows from the detections; windows are on the last axis of `found`."""
+    early = found & (latency < REACTION_MIN_MS)
+    detected = found & ~early
+    # a wrong-way crossing before the detection (or anywhere, if none)
+    before = np.arange(wrong.shape[-1]) <= np.where(found, hit, wrong.shape[-1])[..., None]
+    wrong = (wrong & before).any(axis=-1)
+    p50, p95 = percentiles(latency, detected)
+    n = found.shape[-1]
+    rows = []
+    for idx in np.ndindex(found.shape[:-1]):
+        rows.append((first[idx[0]], second[idx[1]] if second is not None else None,
+                     detected[idx].mean(), (~found[idx]).mean(), early[idx].mean(),
+                     wrong[idx].mean(), p50[idx], p95[idx]))
+    return rows, n
+
+
+def sweep_turns(windows):
+    """
+    First turn per TURN_* window for every STEPS_PER_TURN, decoded like
+    encoder.QuadratureDecoder: steps accumulate while the direction stays
+    the same and restart when it changes. Returns rows like sweep_tilt().
+    """
+    windows = [w for w in windows if w.move in ("TURN_CW", "TURN_CCW")]
+    if not windows:
+        return [], 0
+    d, valid = pad([w.enc for w in windows])
+    t, _ = pad([w.enc_t for w in windows], np.inf)
+    sign = np.array([1 if w.move == "TURN_CW" else -1 for w in windows])
+
+    # Steps since the direction last changed, for every window at once
+    s = np.sign(d)
+    prev = np.concatenate([np.zeros((len(windows), 1)), s[:, :-1]], axis=1)
+    starts = valid & (s != prev)
+    run_start = np.maximum.accumulate(np.where(starts, np.arange(d.shape[1]), 0), axis=1)
+    total = np.cumsum(d, axis=1)
+    before_run = (total - d)[np.arange(len(windows))[:, None], run_start]
+    run = np.abs(total - before_run)
+
+    # Turns: shape (steps, windows, changes)
+    turn = (run[None] >= STEPS[:, None, None]) & valid
+    same = s == sign[:, None]
+    hit, found = first_true(turn & same)
+    latency = t[np.arange(len(windows)), hit]
+    return rates(STEPS, None, found, latency, turn & ~same, hit)
+
+
+def recorded_stats(windows, moves):
+    """Detection rate and p50 latency of the recorded game itself."""
+    ends = [w.end for w in windows if w.move in moves and w.detected]
+    n = len([w for w in windows if w.move in moves])
+    if not n:
+        return "no windows"
+    p50 = np.percentile(ends, 50) if ends else float("nan")
+    return "{} windows, {:.0%} detected, p50 {:.0f} ms".format(n, len(ends) / n, p50)
+
+
+def print_table(title, header, rows, current):
+    """Best first: fewest missed + early, then the lowest p50."""
+    rows = sorted(rows, key=lambda r: (round(r[3] + r[4], 6),
+                                       r[6] if r[6] == r[6] else 1e9))
+    shown = rows[:TOP]
+    for r in rows[TOP:]:
+        if current(r):
+            shown.append(r)
+    print(title)
+    print(header + "  detected   missed    early    wrong   p50 ms   p95 ms")
+    for r in shown:
+        settings = "{:>7.2f} {:>7.1f}".format(r[0], r[1]) if r[1] is not None \
+            else "{:>15d}".format(int(r[0]))
+        print("{}{} {:>9.1%} {:>8.1%} {:>8.1%} {:>8.1%} {:>8.1f} {:>8.1f}".format(
+            "*" if current(r) else " ", settings, r[2], r[3], r[4], r[5], r[6], r[7]))
+    print()
+
+
+def main(paths):
+    windows = []
+    for path in paths:
+        windows += split(replay.load(path))
+    print("{} files, {} move windows".format(len(paths), len(windows)))
+    print("recorded tilts: " + recorded_stats(windows, ("TILT_LEFT", "TILT_RIGHT")))
+    print("recorded turns: " + recorded_stats(windows, ("TURN_CW", "TURN_CCW")))
+    print()
+
+    rows, n = sweep_tilt(windows)
+    if n:
+        print_table("tilt ({} windows)".format(n), "   alpha TILT_TH", rows,
+                    lambda r: np.isclose(r[0], ALPHA) and np.isclose(r[1], TILT_TH))
+    rows, n = sweep_turns(windows)
+    if n:
+        print_table("turns ({} windows)".format(n), " STEPS_PER_TURN", rows,
+                    lambda r: r[0] == STEPS_PER_TURN)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python3 traceSweep.py game.rec [game2.rec ...]")
+        sys.exit(2)
+    main(sys.argv[1:])